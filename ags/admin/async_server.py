@@ -0,0 +1,539 @@
+import asyncio
+import os
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+from ags.exceptions import HTTPError, ConnectionError
+from ags.session import DEFAULT_POOL_SIZE
+
+from .base import BaseServerAdmin
+from .server import DEFAULT_PART_SIZE
+from .tokens import AsyncTokenManager
+
+
+class AsyncServerAdmin(BaseServerAdmin):
+    """
+    An asyncio connection to an ArcGIS server admin. Provides the same operations as ``ServerAdmin``, as coroutines.
+    Bulk service operations run concurrently, limited by ``max_concurrency`` rather than a number of workers.
+    Requires `aiohttp <https://docs.aiohttp.org/>`_.
+
+    Usage::
+
+        async with AsyncServerAdmin(hostname, admin_user, admin_pwd) as server_admin:
+            folders, services = await server_admin.list_services()
+    """
+
+    def __init__(self, host, username, password, secure=False, admin_root="/arcgis/admin", session=None,
+                 pool_size=DEFAULT_POOL_SIZE, max_concurrency=DEFAULT_POOL_SIZE, timeout=None, token_margin=60,
+                 token_refresh_ahead=300, token_cache=None, codec=None, lazy_definitions=False,
+                 retry_policy=None):
+        """
+        Create a new asyncio connection to an ArcGIS server admin.
+
+        :param host: ArcGIS server hostname
+        :param username: Admin username
+        :param password: Admin password
+        :param secure: If True, requests will use HTTPS only
+        :param admin_root: Root server admin path
+        :param session: ``aiohttp.ClientSession`` to use for requests (optional). If not provided, a new session is
+        created on first use.
+        :param pool_size: maximum number of pooled connections, if a new session is created
+        :param max_concurrency: maximum number of requests in progress at once
+        :param timeout: total request timeout in seconds (optional)
+        :param token_margin: tokens are not used within this many seconds of their expiration
+        :param token_refresh_ahead: tokens are refreshed in advance when they expire within this many seconds
+        :param token_cache: cache used to share tokens between processes (optional), e.g., a ``FileTokenCache``
+        :param codec: JSON codec, or name of a codec (see ``ags.codec.get_codec``). Defaults to the fastest installed.
+        :param lazy_definitions: if True, service definitions are hydrated lazily and losslessly: properties the client
+        does not know about are retained, and nested properties and extensions are decoded to typed objects when first
+        accessed (see ``ags.base.Properties.set_from_dictionary``)
+        :param retry_policy: policy for retrying requests which fail with transient errors, and for failing fast while
+        the server is unhealthy (optional), e.g., an ``ags.retry.RetryPolicy``. Only idempotent requests are retried.
+        """
+
+        if aiohttp is None:
+            raise ImportError("AsyncServerAdmin requires aiohttp")
+
+        super(AsyncServerAdmin, self).__init__(
+            host, username, password, secure, admin_root, timeout, codec, lazy_definitions
+        )
+        self.session = session
+        self.pool_size = pool_size
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.token_manager = AsyncTokenManager(
+            self._request_token, margin=token_margin, refresh_ahead=token_refresh_ahead, cache=token_cache,
+            cache_key=self._get_token_cache_key()
+        )
+        self.retry_policy = retry_policy
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    def _get_session(self):
+        if self.session is None:
+            self.session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.pool_size),
+                timeout=aiohttp.ClientTimeout(total=self.timeout)
+            )
+        return self.session
+
+    async def _request(self, method, url, **kwargs):
+        async with self.semaphore:
+            try:
+                async with self._get_session().request(method, url, **kwargs) as response:
+                    content = await response.read()
+                    return self._handle_response(url, response.status, response.reason, content)
+            except aiohttp.ClientConnectionError as e:
+                raise ConnectionError(str(e))
+
+    async def _send(self, fn, idempotent=False):
+        """Awaits ``fn()``, which makes a request, using the retry policy if there is one."""
+
+        if self.retry_policy is None:
+            return await fn()
+        return await self.retry_policy.call_async(self.host, fn, idempotent)
+
+    async def _post(self, path, data=None, files=None, idempotent=False):
+        token = await self.token_manager.get_token()
+
+        url, data = self._prepare_request(path, data, token)
+
+        def create_body():
+            # Form data can only be sent once, so it is created for each attempt
+            if not files:
+                return data
+            form = aiohttp.FormData()
+            for k, v in data.items():
+                form.add_field(k, str(v))
+            for k, v in files.items():
+                if isinstance(v, tuple):
+                    # (filename, content)
+                    form.add_field(k, v[1] or b"", filename=v[0])
+                else:
+                    form.add_field(k, v or b"", filename=getattr(v, 'name', None) or k)
+            return form
+
+        return await self._send(lambda: self._request('POST', url, data=create_body()), idempotent)
+
+    async def _get(self, path, data=None):
+        token = await self.token_manager.get_token()
+
+        url, data = self._prepare_request(path, data, token)
+        return await self._send(lambda: self._request('GET', url, params=data), idempotent=True)
+
+    async def close(self):
+        """Closes the HTTP session held by this server admin connection."""
+
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def generate_token(self, duration=None):
+        """
+        Generates a new token for this server. This should never need to be called directly, as the server will
+        automatically generate a new token when necessary.
+
+        :param duration: The duration of the generated token in minutes
+        """
+
+        token, expiration = await self._request_token(duration)
+        self.token_manager.set_token(token, expiration)
+
+    async def _request_token(self, duration=None):
+        url, data = self._prepare_token_request(duration)
+        response = await self._send(lambda: self._request('POST', url, data=data), idempotent=True)
+        return self._parse_token_response(response)
+
+    async def list_services(self, folder=''):
+        """
+        Returns two values. The first value is a list of folder names in the form
+        [{'name': name, 'description': description}, ...], the second is a list of services in the form:
+        [{'name': name, 'type': type, 'description': description}, ...]
+
+        :param folder: folder within which to list services and subfolders.
+        """
+
+        return self._parse_service_list(await self._get(self._get_path("list_services", folder=folder)))
+
+    async def service_exists(self, service_name, service_type, folder=''):
+        """
+        Checks to see if the service exists on this server
+
+        :param service_name: name of the service
+        :param service_type: service type
+        :param folder: folder path to service
+        """
+
+        try:
+            await self.get_service_status(service_name, service_type, folder)
+            return True
+        except HTTPError as e:
+            if not e.status_code == 404:
+                raise
+        return False
+
+    async def create_folder(self, folder_name, description):
+        """
+        Creates a new folder on the ArcGIS server.
+
+        :param folder_name: name of the folder to create
+        :param description: description of the folder
+        """
+
+        data = {
+            'folderName': folder_name,
+            'description': description
+        }
+        await self._post(self._get_path("create_folder"), data)
+
+    async def edit_folder(self, folder_name, description, web_encrypted=False):
+        """
+        Modifies the given folder description and "webEncrypted" property
+
+        :param folder_name: the folder to modify
+        :param description: updated description
+        :param web_encrypted: sets the webEncrypted property of the folder
+        """
+
+        data = {
+            'description': description,
+            'webEncrypted': web_encrypted,
+        }
+        await self._post(self._get_path("edit_folder", folder=folder_name), data)
+
+    async def delete_folder(self, folder_name):
+        """
+        Deletes the given folder and all services within it
+
+        :param folder_name: the folder to delete
+        """
+
+        await self._post(self._get_path("delete_folder", folder=folder_name))
+
+    async def get_service(self, service_name, service_type, folder=''):
+        """
+        Retrieves a service definition from this ArcGIS server.
+
+        :param service_name: service name
+        :param service_type: service type
+        :param folder: folder path containing the service
+        """
+
+        response = await self._get(self._get_path("get_service",
+                                                  service_path=self._get_service_path(service_name, folder),
+                                                  service_type=service_type))
+        return self._create_service_definition(service_name, service_type, response, folder)
+
+    async def create_service(self, service, folder=None):
+        """
+        Creates the given service on this ArcGIS server.
+
+        :param service: service name
+        :param folder: folder to create the service within (optional)
+        """
+
+        await self._post(self._get_create_service_path(folder), self._serialize_service(service))
+
+    async def edit_service(self, service, service_name, service_type, folder='', force=False):
+        """
+        Modifies the given service on this ArcGIS server.
+
+        :param service: service properties object
+        :param service_name: service name
+        :param service_type: service type
+        :param folder: folder path containing the service
+        :param force: if True, the service is edited even if its definition has not changed
+        :return: list of the paths of changed values (e.g., 'properties.maxRecordCount'), compared to the definition as
+        it was retrieved from the server, or all properties if it was not. If the list is empty, the service was not
+        changed and no request was made (unless ``force`` is True). ArcGIS server restarts a service whenever it is
+        edited.
+        """
+
+        path = self._get_path("edit_service", service_path=self._get_service_path(service_name, folder),
+                              service_type=service_type)
+        data, changes = self._prepare_service_edit(service, service_name, service_type, folder, force)
+        if data is None:
+            return changes
+
+        await self._post(path, data)
+        self._mark_service_clean(service, data, service_name, service_type, folder)
+        return changes
+
+    async def get_service_item_info(self, service_name, service_type, folder=''):
+        """
+        Retrieves item info for the given service on this ArcGIS server.
+
+        :param service_name: service name
+        :param service_type: service type
+        :param folder: folder path containing the service
+        :return: service item information object
+        """
+
+        path = self._get_path("get_service_item_info", service_path=self._get_service_path(service_name, folder),
+                              service_type=service_type)
+        return self._create_service_item_info(await self._get(path))
+
+    async def edit_service_item_info(self, info, service_name, service_type, folder=''):
+        """
+        Sets item info for the given service on this ArcGIS server.
+
+        :param info: service item information object
+        :param service_name: service name
+        :param service_type: service type
+        :param folder: folder path containing the service
+        """
+
+        path = self._get_path("edit_service_item_info", service_path=self._get_service_path(service_name, folder),
+                              service_type=service_type)
+        await self._post(path, self._serialize_service_item_info(info), files={'thumbnail': b""})
+
+    async def get_service_status(self, service_name, service_type, folder=''):
+        """
+        Gets the status info for the given service on this ArcGIS server.
+
+        :param service_name: service name
+        :param service_type: service type
+        :param folder: folder path containing the service
+        """
+
+        response = await self._get(self._get_path("get_service_status",
+                                                  service_path=self._get_service_path(service_name, folder),
+                                                  service_type=service_type))
+        return self._create_service_status(response)
+
+    async def get_folder_report(self, folder='', include_definitions=False):
+        """
+        Retrieves the status, and optionally the definitions, of all services in a folder with a single request. Returns
+        a dictionary mapping each (service_name, service_type, folder) tuple to a dictionary in the form
+        {'status': ServiceStatus, 'definition': ServiceDefinition}. The definition is None unless
+        ``include_definitions`` is True, and only includes the properties provided by the report.
+
+        :param folder: folder containing the services (defaults to the root folder)
+        :param include_definitions: if True, service descriptions and properties are included
+        """
+
+        response = await self._get(self._get_folder_report_path(folder),
+                                   self._get_folder_report_params(include_definitions))
+        return self._parse_folder_report(folder, response, include_definitions)
+
+    async def start_service(self, service_name, service_type, folder=''):
+        """
+        Starts the specified service on this ArcGIS server.
+
+        :param service_name: service name
+        :param service_type: service type
+        :param folder: folder path containing the service
+        """
+
+        await self._post(self._get_path("start_service", service_path=self._get_service_path(service_name, folder),
+                                        service_type=service_type), idempotent=True)
+
+    async def stop_service(self, service_name, service_type, folder=''):
+        """
+        Stops the specified service on this ArcGIS server.
+
+        :param service_name: service name
+        :param service_type: service type
+        :param folder: folder path containing the service
+        """
+
+        await self._post(self._get_path("stop_service", service_path=self._get_service_path(service_name, folder),
+                                        service_type=service_type), idempotent=True)
+
+    async def delete_service(self, service_name, service_type, folder=''):
+        """
+        Deletes the specified service on this ArcGIS server.
+
+        :param service_name: service name
+        :param service_type: service type
+        :param folder: folder path containing the service
+        """
+
+        await self._post(self._get_path("delete_service", service_path=self._get_service_path(service_name, folder),
+                                        service_type=service_type))
+
+    async def upload_item(self, file_or_path, description):
+        """
+        Uploads a file, provided as a path of a file-like object.
+
+        :param file_or_path: file-like object or path to a file
+        :param description: description of file
+        """
+
+        if isinstance(file_or_path, str):
+            with open(file_or_path, 'rb') as file_obj:
+                response = await self._post(self._get_path("upload_item"), data={'description': description},
+                                            files={'itemFile': file_obj})
+        else:
+            response = await self._post(self._get_path("upload_item"), data={'description': description},
+                                        files={'itemFile': file_or_path})
+        return self._create_upload_item(response)
+
+    async def register_upload(self, name, description=''):
+        """
+        Registers a new item to be uploaded in parts. Use the ID of the returned item with ``upload_item_in_parts``.
+
+        :param name: item (file) name
+        :param description: description of item
+        :return: upload item object
+        """
+
+        response = await self._post(self._get_path("register_upload"), {'itemName': name, 'description': description})
+        return self._create_upload_item(response)
+
+    async def get_upload_item(self, item_id):
+        """
+        Retrieves information about an uploaded item.
+
+        :param item_id: upload item ID
+        :return: upload item object
+        """
+
+        return self._create_upload_item(await self._get(self._get_path("get_upload_item", item_id=item_id)))
+
+    async def get_upload_parts(self, item_id):
+        """
+        Returns a sorted list of the part numbers which have been uploaded for the given item.
+
+        :param item_id: upload item ID
+        """
+
+        response = await self._get(self._get_path("get_upload_parts", item_id=item_id))
+        return sorted(int(part) for part in response.get('parts', []))
+
+    async def upload_item_in_parts(self, file_or_path, description='', item_id=None, part_size=DEFAULT_PART_SIZE,
+                                   max_workers=4, progress=None):
+        """
+        Uploads a large file in parts, several parts at a time, then commits the upload. If ``item_id`` is given, parts
+        already uploaded for that item are skipped, so an interrupted upload can be resumed by calling this method again
+        with the same item ID (as returned by ``register_upload``).
+
+        :param file_or_path: seekable file-like object or path to a file
+        :param description: description of file (used if registering a new item)
+        :param item_id: ID of a registered upload item (optional). If not given, a new item is registered.
+        :param part_size: size of each part in bytes
+        :param max_workers: maximum number of parts to upload at once
+        :param progress: callable (optional) which is called as ``progress(bytes_uploaded, total_bytes)`` after each
+        part
+        :return: committed upload item object
+        """
+
+        if isinstance(file_or_path, str):
+            file_obj = open(file_or_path, 'rb')
+            name = os.path.basename(file_or_path)
+        else:
+            file_obj = file_or_path
+            name = os.path.basename(getattr(file_or_path, 'name', 'upload'))
+
+        try:
+            file_obj.seek(0, os.SEEK_END)
+            total = file_obj.tell()
+            part_count = max((total + part_size - 1) // part_size, 1)
+
+            if item_id is None:
+                item_id = (await self.register_upload(name, description)).id
+                uploaded = set()
+            else:
+                uploaded = set(await self.get_upload_parts(item_id))
+
+            state = {'bytes': sum(min(part_size, total - (n - 1) * part_size) for n in uploaded if n <= part_count)}
+            # Parts are only read once a slot is free, so that memory use is bounded by the part size
+            slots = asyncio.Semaphore(max_workers)
+
+            async def upload_part(number):
+                async with slots:
+                    file_obj.seek((number - 1) * part_size)
+                    content = file_obj.read(part_size)
+
+                    # Uploading a part again replaces it, so part uploads may be retried
+                    path = self._get_path("upload_part", item_id=item_id)
+                    await self._post(path, {'partNumber': number},
+                                     files={'partFile': ("%s.part%d" % (name, number), content)}, idempotent=True)
+
+                state['bytes'] += len(content)
+                if progress is not None:
+                    progress(state['bytes'], total)
+
+            tasks = [
+                asyncio.ensure_future(upload_part(n)) for n in range(1, part_count + 1) if n not in uploaded
+            ]
+            try:
+                await asyncio.gather(*tasks)
+            except BaseException:
+                for task in tasks:
+                    task.cancel()
+                raise
+        finally:
+            if file_obj is not file_or_path:
+                file_obj.close()
+
+        parts = ",".join(str(n) for n in range(1, part_count + 1))
+        await self._post(self._get_path("commit_upload", item_id=item_id), {'parts': parts})
+        return await self.get_upload_item(item_id)
+
+    async def _map_services(self, method, services):
+        """
+        Awaits ``method`` for each service, concurrently (up to ``max_concurrency`` requests are in progress at once).
+        Returns a dictionary mapping each (service_name, service_type, folder) tuple to the result of the call, or to
+        the exception it raised.
+        """
+
+        services = [(s[0], s[1], s[2] if len(s) > 2 else '') for s in services]
+        results = await asyncio.gather(*[method(*service) for service in services], return_exceptions=True)
+        return dict(zip(services, results))
+
+    async def get_services(self, services):
+        """
+        Retrieves several service definitions from this ArcGIS server concurrently. Returns a dictionary mapping each
+        (service_name, service_type, folder) tuple to its service definition, or to the exception raised retrieving it.
+
+        :param services: list of (service_name, service_type, folder) tuples
+        """
+
+        return await self._map_services(self.get_service, services)
+
+    async def get_service_statuses(self, services):
+        """
+        Gets the status info for several services on this ArcGIS server concurrently. Returns a dictionary mapping each
+        (service_name, service_type, folder) tuple to its status, or to the exception raised retrieving it.
+
+        :param services: list of (service_name, service_type, folder) tuples
+        """
+
+        return await self._map_services(self.get_service_status, services)
+
+    async def start_services(self, services):
+        """
+        Starts several services on this ArcGIS server concurrently. Returns a dictionary mapping each
+        (service_name, service_type, folder) tuple to None if the service was started, or to the exception raised.
+
+        :param services: list of (service_name, service_type, folder) tuples
+        """
+
+        return await self._map_services(self.start_service, services)
+
+    async def stop_services(self, services):
+        """
+        Stops several services on this ArcGIS server concurrently. Returns a dictionary mapping each
+        (service_name, service_type, folder) tuple to None if the service was stopped, or to the exception raised.
+
+        :param services: list of (service_name, service_type, folder) tuples
+        """
+
+        return await self._map_services(self.stop_service, services)
+
+    async def delete_services(self, services):
+        """
+        Deletes several services on this ArcGIS server concurrently. Returns a dictionary mapping each
+        (service_name, service_type, folder) tuple to None if the service was deleted, or to the exception raised.
+
+        :param services: list of (service_name, service_type, folder) tuples
+        """
+
+        return await self._map_services(self.delete_service, services)
@@ -0,0 +1,235 @@
+from ags.admin.services.base import ServiceStatus
+from ags.admin.services.mapserver import MapServerDefinition
+from ags.admin.uploads import UploadItem
+from ags.base import copy_data, diff_data
+from ags.codec import get_codec
+from ags.exceptions import HTTPError, ServerError
+
+from .paths import AGS_ADMIN_PATH_PATTERNS
+from .services.gp import GPServerDefinition
+from .services.base import ServiceDefinition, ServiceItemInfo
+from .tokens import FileTokenCache
+
+
+class BaseServerAdmin(object):
+    """
+    Request building and response handling shared by the synchronous and asynchronous server admin clients. Subclasses
+    provide the transport.
+    """
+
+    def __init__(self, host, username, password, secure=False, admin_root="/arcgis/admin", timeout=None, codec=None,
+                 lazy_definitions=False):
+        self.host = host
+        self.username = username
+        self.password = password
+        self.root = admin_root.rstrip('/')
+        self.scheme = 'https' if secure else 'http'
+        self.timeout = timeout
+        self.codec = get_codec(codec)
+        self.lazy_definitions = lazy_definitions
+
+    @property
+    def token(self):
+        return self.token_manager.token
+
+    @property
+    def token_expiration(self):
+        return self.token_manager.expiration
+
+    def _get_token_cache_key(self):
+        return FileTokenCache.make_key(self.scheme, self.host, self.root, self.username)
+
+    def _get_url(self, path):
+        return "%s://%s%s" % (self.scheme, self.host, path)
+
+    def _prepare_request(self, path, data, token):
+        """Returns the URL and a new dictionary of request parameters. The given data is not modified."""
+
+        params = dict(data or {})
+        params.update({
+            'f': "json",
+            'token': token
+        })
+        return self._get_url(path), params
+
+    def _prepare_token_request(self, duration=None):
+        """Returns the URL and parameters used to request a new token."""
+
+        data = {
+            'username': self.username,
+            'password': self.password,
+            'client': "requestip",
+            'f': "json"
+        }
+        if duration is not None:
+            if duration < 1 or duration > 20160:
+                raise ValueError('Duration must be a positive integer in minutes, no greater than 20160 (14 days)')
+            data['expiration'] = duration
+
+        return self._get_url(self._get_path("generate_token")), data
+
+    def _parse_token_response(self, response):
+        try:
+            return response['token'], float(response['expires'] or 0)
+        except KeyError:
+            raise ValueError("ArcGIS server returned an invalid generate token resopnse: %s" % str(response))
+
+    def _process_response(self, url, response):
+        """Internal method to validate and deserialize server response."""
+
+        return self._handle_response(url, response.status_code, response.reason, response.content)
+
+    def _handle_response(self, url, status_code, reason, content):
+        if status_code >= 300 or status_code < 200:
+            raise HTTPError("Error loading URL %s. The response was %d (%s)" % (url, status_code, reason), status_code)
+        elif content:
+            try:
+                data = self.codec.loads(content)
+                if data.get('status', None) == "error":
+                    if data.get('code', None):
+                        raise HTTPError("Error loading URL %s. The response was %d (%s)" % (url, data['code'],
+                                        ",".join(data['messages'])), data['code'])
+                    raise ServerError("ArcGIS server response indicates error: %s" % data['messages'])
+                return data
+            except ValueError:
+                raise ServerError("Error parsing response from server: %s" % content)
+
+    def _get_service_path(self, service_name, folder=''):
+        return '/'.join((folder, service_name)).lstrip('/')
+
+    def _get_path(self, name, **kwargs):
+        kwargs['admin_root'] = self.root
+        return AGS_ADMIN_PATH_PATTERNS[name] % kwargs
+
+    def _get_create_service_path(self, folder=None):
+        if folder:
+            if folder[0] != "/":
+                folder = "/" + folder
+            return self._get_path("create_service", folder=folder)
+        return self._get_path("create_service", folder="")
+
+    def _get_folder_report_path(self, folder=''):
+        if folder and folder[0] != "/":
+            folder = "/" + folder
+        return self._get_path("get_folder_report", folder=folder or "")
+
+    def _get_folder_report_params(self, include_definitions=False):
+        parameters = ["status"]
+        if include_definitions:
+            parameters += ["description", "properties"]
+        return {'parameters': self.codec.dumps(parameters)}
+
+    def _parse_folder_report(self, folder, response, include_definitions=False):
+        services = {}
+        for report in response.get('reports', []):
+            key = (report['serviceName'], report['type'], folder)
+            services[key] = {
+                'status': self._create_service_status(report.get('status', {})),
+                'definition': None
+            }
+            if include_definitions:
+                services[key]['definition'] = self._create_service_definition(
+                    report['serviceName'], report['type'], {k: v for k, v in report.items() if k != 'status'}, folder
+                )
+        return services
+
+    def _parse_service_list(self, response):
+        folders = []
+        services = []
+
+        for folder in response.get('foldersDetail', []):
+            folders.append({
+              'name': folder['folderName'],
+              'description': folder['description']
+            })
+        for service in response['services']:
+            services.append({
+                'name': service['serviceName'],
+                'type': service['type'],
+                'description': service['description']
+            })
+
+        return folders, services
+
+    def _create_service_definition(self, service_name, service_type, response, folder=''):
+        service = self._hydrate_service_definition(service_name, service_type, response)
+        # The response is the snapshot: it is only compared with the definition when the service is edited
+        service.mark_clean((self._get_service_key(service_name, service_type, folder), response))
+        return service
+
+    def _hydrate_service_definition(self, service_name, service_type, response):
+        if service_type == "GPServer":
+            service = GPServerDefinition(service_name=service_name)
+        elif service_type == "MapServer":
+            service = MapServerDefinition(service_name=service_name)
+        else:
+            service = ServiceDefinition(
+                service_name=service_name,
+                type=service_type
+            )
+
+        if self.lazy_definitions:
+            service.set_from_dictionary(response, lazy=True)
+        else:
+            # The response is kept as a snapshot, so it must not be modified through the definition
+            service.set_from_dictionary(copy_data(response))
+        return service
+
+    def _get_service_key(self, service_name, service_type, folder=''):
+        return service_name, service_type, (folder or '').strip('/')
+
+    def _create_service_item_info(self, response):
+        info = ServiceItemInfo()
+        info.set_from_dictionary(response)
+        return info
+
+    def _create_service_status(self, response):
+        status = ServiceStatus()
+        status.set_from_dictionary(response)
+        return status
+
+    def _create_upload_item(self, response):
+        item = UploadItem()
+        item.set_from_dictionary(response.get('item', response))
+        return item
+
+    def _serialize_service(self, service):
+        return {
+            'service': self.codec.dumps(service.get_data())
+        }
+
+    def _prepare_service_edit(self, service, service_name, service_type, folder='', force=False):
+        """
+        Returns the request data for editing a service and a list of the paths of changed values, compared to the
+        service definition as it was retrieved (or last edited). Definitions retrieved from a different service are
+        compared as if they were never retrieved. If the service is unchanged, the request data is None.
+        """
+
+        key = self._get_service_key(service_name, service_type, folder)
+        snapshot = service.get_snapshot()
+        if snapshot is not None and snapshot[0] != key:
+            snapshot = None
+        if snapshot is not None and not force and not service.has_changes():
+            return None, []
+
+        data = service.get_data()
+        if snapshot is None:
+            return {'service': self.codec.dumps(data)}, list(data.keys())
+
+        original = self._hydrate_service_definition(service_name, service_type, snapshot[1]).get_data()
+        changes = diff_data(original, data)
+        if not changes and not force:
+            return None, []
+        return {'service': self.codec.dumps(data)}, changes
+
+    def _mark_service_clean(self, service, data, service_name, service_type, folder=''):
+        """Marks a service definition as clean after it was edited with the given request data."""
+
+        service.mark_clean(
+            (self._get_service_key(service_name, service_type, folder), self.codec.loads(data['service']))
+        )
+
+    def _serialize_service_item_info(self, info):
+        return {
+            'serviceItemInfo': self.codec.dumps(info.get_data())
+        }
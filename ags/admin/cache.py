@@ -0,0 +1,91 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+
+class ResponseCache(object):
+    """
+    Least-recently-used cache of admin API responses, with a time-to-live for each endpoint. Responses are copied in
+    and out of the cache, so callers may modify the objects built from them.
+    """
+
+    DEFAULT_TTLS = {
+        'list_services': 60,
+        'get_service': 300,
+        'get_service_item_info': 300,
+        'get_service_status': 10
+    }
+
+    def __init__(self, max_size=1000, ttls=None):
+        """
+        :param max_size: maximum number of responses to keep
+        :param ttls: dictionary mapping endpoint names (e.g., 'get_service') to the number of seconds responses are
+        kept. Endpoints which are not listed use ``DEFAULT_TTLS``.
+        """
+
+        self.max_size = max_size
+        self.ttls = dict(self.DEFAULT_TTLS)
+        if ttls:
+            self.ttls.update(ttls)
+
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, endpoint, key):
+        """Returns a (hit, value) tuple. If the key is not cached or has expired, returns (False, None)."""
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != endpoint or entry[1] < time.time():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return False, None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            value = entry[2]
+
+        return True, copy.deepcopy(value)
+
+    def set(self, endpoint, key, value):
+        ttl = self.ttls.get(endpoint, 0)
+        if ttl <= 0:
+            return
+
+        value = copy.deepcopy(value)
+        with self._lock:
+            self._entries[key] = (endpoint, time.time() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key):
+        """Removes a single key from the cache."""
+
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def invalidate_prefix(self, prefix):
+        """Removes the given key, and all keys beneath it (i.e., starting with the key followed by '/')."""
+
+        with self._lock:
+            for key in [k for k in self._entries if k == prefix or k.startswith(prefix.rstrip('/') + '/')]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Returns a dictionary of cache statistics."""
+
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'size': len(self._entries)
+            }
@@ -0,0 +1,137 @@
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from .server import DEFAULT_MAX_WORKERS
+
+
+class SiteCrawler(object):
+    """
+    Walks every folder of an ArcGIS server, listing folders and fetching service details concurrently.
+
+    Usage::
+
+        crawler = SiteCrawler(server_admin, include_status=True)
+        for service in crawler.crawl():
+            print(service['folder'], service['name'], service['status'].realtime_state)
+        print("Crawled %d services in %.1f seconds" % (crawler.service_count, crawler.elapsed))
+    """
+
+    def __init__(self, server_admin, include_definitions=False, include_status=False, max_workers=DEFAULT_MAX_WORKERS,
+                 use_folder_reports=False, max_queued=None):
+        """
+        :param server_admin: ``ServerAdmin`` connection
+        :param include_definitions: if True, the service definition of each service is retrieved
+        :param include_status: if True, the status of each service is retrieved
+        :param max_workers: maximum number of requests to make at once
+        :param use_folder_reports: if True, service status is retrieved with one folder report request per folder,
+        rather than one request per service
+        :param max_queued: folders are not listed while this many services are waiting for their details to be
+        retrieved. Defaults to 10 times ``max_workers``.
+        """
+
+        self.server_admin = server_admin
+        self.include_definitions = include_definitions
+        self.include_status = include_status
+        self.max_workers = max_workers
+        self.use_folder_reports = use_folder_reports
+        self.max_queued = max_queued if max_queued is not None else max_workers * 10
+
+        self.elapsed = None
+        self.folder_count = 0
+        self.service_count = 0
+
+    def _list_folder(self, folder):
+        try:
+            return folder, self._get_folder_contents(folder)
+        except Exception as e:
+            return folder, e
+
+    def _get_folder_contents(self, folder):
+        folders, services = self.server_admin.list_services(folder)
+        if self.include_status and self.use_folder_reports:
+            report = self.server_admin.get_folder_report(folder)
+            for service in services:
+                key = (service['name'], service['type'], folder)
+                if key in report:
+                    service['status'] = report[key]['status']
+        return folders, services
+
+    def _get_details(self, service):
+        try:
+            if self.include_definitions:
+                service['definition'] = self.server_admin.get_service(service['name'], service['type'],
+                                                                      service['folder'])
+            if self.include_status and 'status' not in service:
+                service['status'] = self.server_admin.get_service_status(service['name'], service['type'],
+                                                                         service['folder'])
+        except Exception as e:
+            service['error'] = e
+        return service
+
+    def crawl(self, folder=''):
+        """
+        Generator which yields a dictionary for each service, as it is found, in the form
+        {'folder': folder, 'name': name, 'type': type, 'description': description}. If service definitions or status
+        are included, they are added as 'definition' and 'status', respectively. If retrieving them fails, the
+        exception is added as 'error'. If listing a folder fails, a dictionary for the folder is yielded, with None as
+        its name, type, and description, and the exception as 'error'; its subfolders are not crawled.
+
+        Services are yielded in no particular order. At most ``max_workers`` service detail requests and folder listings
+        are kept in progress at once, and folders are not listed while ``max_queued`` services are waiting for their
+        details, so memory use is bounded by the number of services in the largest folder rather than on the server.
+
+        :param folder: folder from which to start crawling (defaults to the root folder)
+        """
+
+        fetch_details = self.include_definitions or (self.include_status and not self.use_folder_reports)
+        start = time.time()
+        self.elapsed = None
+        self.folder_count = 0
+        self.service_count = 0
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            pending_folders = deque([folder])
+            folder_futures = set()
+            service_futures = set()
+            queued = deque()
+
+            try:
+                while pending_folders or folder_futures or service_futures or queued:
+                    while queued and len(service_futures) < self.max_workers:
+                        service_futures.add(executor.submit(self._get_details, queued.popleft()))
+                    while (pending_folders and len(folder_futures) < self.max_workers and
+                           len(queued) < self.max_queued):
+                        folder_futures.add(executor.submit(self._list_folder, pending_folders.popleft()))
+
+                    done, _ = wait(folder_futures | service_futures, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        if future in folder_futures:
+                            folder_futures.remove(future)
+                            parent, result = future.result()
+                            self.folder_count += 1
+
+                            if isinstance(result, Exception):
+                                yield {'folder': parent, 'name': None, 'type': None, 'description': None,
+                                       'error': result}
+                                continue
+
+                            folders, services = result
+                            for subfolder in folders:
+                                pending_folders.append('/'.join((parent, subfolder['name'])).lstrip('/'))
+
+                            for service in services:
+                                service['folder'] = parent
+                                if fetch_details:
+                                    queued.append(service)
+                                else:
+                                    self.service_count += 1
+                                    yield service
+                        else:
+                            service_futures.remove(future)
+                            self.service_count += 1
+                            yield future.result()
+            finally:
+                for future in folder_futures | service_futures:
+                    future.cancel()
+                self.elapsed = time.time() - start
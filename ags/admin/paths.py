@@ -2,8 +2,8 @@ AGS_ADMIN_PATH_PATTERNS = {
     'generate_token': "%(admin_root)s/generateToken",
     'list_services': "%(admin_root)s/services/%(folder)s",
     'create_folder': "%(admin_root)s/services/createFolder",
-    'edit_folder': "%(admin_root)s/services/%(folder)/editFolder",
-    'delete_folder': "%(admin_root)s/services/%(folder)/deleteFolder",
+    'edit_folder': "%(admin_root)s/services/%(folder)s/editFolder",
+    'delete_folder': "%(admin_root)s/services/%(folder)s/deleteFolder",
     'create_service': "%(admin_root)s/services%(folder)s/createService",
     'get_service': "%(admin_root)s/services/%(service_path)s.%(service_type)s",
     'edit_service': "%(admin_root)s/services/%(service_path)s.%(service_type)s/edit",
@@ -13,5 +13,11 @@ AGS_ADMIN_PATH_PATTERNS = {
     'start_service': "%(admin_root)s/services/%(service_path)s.%(service_type)s/start",
     'stop_service': "%(admin_root)s/services/%(service_path)s.%(service_type)s/stop",
     'delete_service': "%(admin_root)s/services/%(service_path)s.%(service_type)s/delete",
-    'upload_item': "%(admin_root)s/uploads/upload"
+    'get_folder_report': "%(admin_root)s/services%(folder)s/report",
+    'upload_item': "%(admin_root)s/uploads/upload",
+    'register_upload': "%(admin_root)s/uploads/register",
+    'get_upload_item': "%(admin_root)s/uploads/%(item_id)s",
+    'get_upload_parts': "%(admin_root)s/uploads/%(item_id)s/parts",
+    'upload_part': "%(admin_root)s/uploads/%(item_id)s/uploadPart",
+    'commit_upload': "%(admin_root)s/uploads/%(item_id)s/commit"
 }
\ No newline at end of file
@@ -0,0 +1,425 @@
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from ags.base import diff_data
+
+from .crawler import SiteCrawler
+from .server import DEFAULT_MAX_WORKERS
+
+
+SYSTEM_FOLDERS = ('System', 'Utilities')
+
+# Request parameters included in service definitions, which are not properties of the service
+REQUEST_KEYS = ('f',)
+
+
+class ServiceSpec(object):
+    """Desired state of a service."""
+
+    def __init__(self, definition, folder='', item_info=None, state='STARTED'):
+        """
+        :param definition: service definition, e.g., a ``MapServerDefinition`` or ``GPServerDefinition``. Only the
+        properties which were given explicitly (not default values, nor empty lists or dictionaries) are reconciled;
+        other properties of an existing service are left as they are. Extensions are matched by type name, and only
+        the extensions and extension properties it contains are reconciled.
+        :param folder: folder containing the service
+        :param item_info: ``ServiceItemInfo`` (optional). Only the properties it contains are reconciled.
+        :param state: 'STARTED', 'STOPPED', or None to leave the state of the service as it is
+        """
+
+        self.definition = definition
+        self.folder = (folder or '').strip('/')
+        self.item_info = item_info
+        self.state = state
+
+    @property
+    def key(self):
+        return self.definition.service_name, self.definition.type, self.folder
+
+
+class Manifest(object):
+    """Desired state of folders and services on an ArcGIS server."""
+
+    def __init__(self, folders=None, services=None):
+        """
+        :param folders: dictionary of folder names to descriptions, or a list of folder names. Folders containing
+        services in the manifest need not be listed.
+        :param services: list of ``ServiceSpec`` objects
+        """
+
+        if folders is None:
+            folders = {}
+        elif not isinstance(folders, dict):
+            folders = {name: '' for name in folders}
+
+        self.folders = {name.strip('/'): description for name, description in folders.items()}
+        self.services = list(services or [])
+
+        for spec in self.services:
+            if spec.folder:
+                self.folders.setdefault(spec.folder, '')
+
+
+class Action(object):
+    """A single step of a reconciliation plan."""
+
+    CREATE_FOLDER = 'create_folder'
+    CREATE = 'create'
+    EDIT = 'edit'
+    EDIT_ITEM_INFO = 'edit_item_info'
+    START = 'start'
+    STOP = 'stop'
+    DELETE = 'delete'
+
+    # Actions are applied in this order; each phase completes before the next begins
+    PHASES = (CREATE_FOLDER, CREATE, EDIT, EDIT_ITEM_INFO, STOP, START, DELETE)
+
+    # Editing a service restarts it
+    DISRUPTIVE = (EDIT,)
+
+    SYMBOLS = {
+        CREATE_FOLDER: '+',
+        CREATE: '+',
+        EDIT: '~',
+        EDIT_ITEM_INFO: '~',
+        START: '>',
+        STOP: '.',
+        DELETE: '-'
+    }
+
+    def __init__(self, action, folder, service_name=None, service_type=None, data=None, changes=None,
+                 cluster=None):
+        """
+        :param action: one of the action constants
+        :param folder: folder name
+        :param service_name: service name (if a service action)
+        :param service_type: service type (if a service action)
+        :param data: definition, item info, or folder description to apply (if any)
+        :param changes: list of the paths of changed values (for edits)
+        :param cluster: cluster containing the service
+        """
+
+        self.action = action
+        self.folder = folder
+        self.service_name = service_name
+        self.service_type = service_type
+        self.data = data
+        self.changes = changes or []
+        self.cluster = cluster
+
+        self.status = None  # 'done', 'failed', or 'skipped', once applied
+        self.error = None
+
+    @property
+    def key(self):
+        if self.service_name is None:
+            return self.folder
+        return self.service_name, self.service_type, self.folder
+
+    def __str__(self):
+        if self.action == self.CREATE_FOLDER:
+            return "%s create folder %s" % (self.SYMBOLS[self.action], self.folder)
+
+        path = '/'.join((self.folder, self.service_name)).lstrip('/')
+        description = "%s %s %s %s" % (
+            self.SYMBOLS[self.action], self.action.replace('_', ' '), self.service_type, path
+        )
+        if self.changes:
+            description += ": %s" % ", ".join(self.changes)
+        return description
+
+    def __repr__(self):
+        return "<Action: %s>" % str(self)
+
+
+class Plan(object):
+    """An ordered list of actions which bring a server to the state described by a manifest."""
+
+    def __init__(self, actions):
+        self.actions = sorted(actions, key=lambda a: Action.PHASES.index(a.action))
+
+    def __len__(self):
+        return len(self.actions)
+
+    def __iter__(self):
+        return iter(self.actions)
+
+    def __str__(self):
+        if not self.actions:
+            return "No changes"
+        return "\n".join(str(action) for action in self.actions)
+
+    @property
+    def errors(self):
+        """Dictionary of action keys to exceptions, for actions which failed."""
+
+        return {action.key: action.error for action in self.actions if action.status == 'failed'}
+
+
+# Keys which identify items of lists in service definitions (e.g., 'typeName' of extensions), in order of preference
+ITEM_KEYS = ('typeName', 'id', 'name')
+
+
+def _get_desired_data(properties):
+    """
+    Returns the data of a ``Properties`` object which was given explicitly (see
+    ``ags.base.Properties.get_explicit_data``), without request parameters and empty lists or dictionaries.
+    """
+
+    def prune(data):
+        return {
+            k: prune(v) if isinstance(v, dict) else v for k, v in data.items()
+            if k not in REQUEST_KEYS and not (isinstance(v, (dict, list)) and not v)
+        }
+
+    return prune(properties.get_explicit_data())
+
+
+def _get_item_key(items):
+    """Returns the key which identifies every item of a list of dictionaries, or None if there isn't one."""
+
+    if not items or not all(isinstance(item, dict) for item in items):
+        return None
+    for key in ITEM_KEYS:
+        if all(key in item for item in items):
+            return key
+    return None
+
+
+def _diff_desired(current, desired, path=''):
+    """
+    Returns the paths at which ``desired`` differs from ``current``, ignoring keys which are not in ``desired``. Items
+    of lists are matched by key (see ``ITEM_KEYS``), and items of ``current`` which are not in ``desired`` are ignored.
+    """
+
+    if isinstance(current, dict) and isinstance(desired, dict):
+        changes = []
+        for k, v in desired.items():
+            changes += _diff_desired(current.get(k), v, "%s.%s" % (path, k) if path else k)
+        return changes
+
+    key = _get_item_key(desired) if isinstance(desired, list) else None
+    if key is not None and isinstance(current, list):
+        current_items = {item.get(key): item for item in current if isinstance(item, dict)}
+        changes = []
+        for item in desired:
+            item_path = "%s[%s]" % (path, item[key])
+            if item[key] in current_items:
+                changes += _diff_desired(current_items[item[key]], item, item_path)
+            else:
+                changes.append(item_path)
+        return changes
+
+    return diff_data(current, desired, path)
+
+
+def _merge(current, desired):
+    """
+    Returns ``current`` with the values of ``desired`` applied, merging nested dictionaries and items of lists which
+    are matched by key.
+    """
+
+    if isinstance(current, list) and isinstance(desired, list):
+        key = _get_item_key(desired)
+        if key is None:
+            return desired
+        desired_items = {item[key]: item for item in desired}
+        merged = []
+        for item in current:
+            if isinstance(item, dict) and item.get(key) in desired_items:
+                merged.append(_merge(item, desired_items.pop(item[key])))
+            else:
+                merged.append(item)
+        return merged + [item for item in desired if item[key] in desired_items]
+
+    if not isinstance(current, dict) or not isinstance(desired, dict):
+        return desired
+    merged = dict(current)
+    for k, v in desired.items():
+        merged[k] = _merge(current.get(k), v)
+    return merged
+
+
+class Reconciler(object):
+    """
+    Brings an ArcGIS server to the state described by a ``Manifest``. The current state of the server is crawled, and
+    a minimal plan of actions is computed, which may be reviewed (``str(plan)`` describes each change) before it is
+    applied.
+
+    Actions are applied in dependency order (folders, then new services, edits, stops and starts, and finally
+    deletions), each phase with up to ``max_workers`` requests at once. ArcGIS server restarts a service when it is
+    edited, so no more than ``max_unavailable`` services in each cluster are edited at once. Actions for a service are
+    skipped if an earlier action for it (or its folder) failed.
+
+    Usage::
+
+        reconciler = Reconciler(server_admin, Manifest(services=[
+            ServiceSpec(MapServerDefinition(service_name='roads', ...), folder='transportation')
+        ]))
+        plan = reconciler.plan()
+        print(plan)
+        reconciler.apply(plan)
+        print(plan.errors)
+    """
+
+    def __init__(self, server_admin, manifest, prune=False, max_workers=DEFAULT_MAX_WORKERS, max_unavailable=1,
+                 ignore_folders=SYSTEM_FOLDERS):
+        """
+        :param server_admin: ``ServerAdmin`` connection
+        :param manifest: desired state
+        :param prune: if True, services which are not in the manifest are deleted
+        :param max_workers: maximum number of requests to make at once
+        :param max_unavailable: maximum number of services in a cluster which may be restarting at once
+        :param ignore_folders: folders which are never modified
+        """
+
+        self.server_admin = server_admin
+        self.manifest = manifest
+        self.prune = prune
+        self.max_workers = max_workers
+        self.max_unavailable = max_unavailable
+        self.ignore_folders = set(ignore_folders or [])
+
+    def _get_current_state(self):
+        folders, _ = self.server_admin.list_services()
+        crawler = SiteCrawler(self.server_admin, include_definitions=True, include_status=True,
+                              max_workers=self.max_workers, use_folder_reports=True)
+        services = {}
+        for service in crawler.crawl():
+            if service['folder'] in self.ignore_folders:
+                continue
+            if 'error' in service:
+                raise service['error']
+            services[(service['name'], service['type'], service['folder'])] = service
+        return set(f['name'] for f in folders), services
+
+    def _get_item_info(self, specs):
+        def get_item_info(spec):
+            return spec.key, self.server_admin.get_service_item_info(*spec.key)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            return dict(executor.map(get_item_info, specs))
+
+    def _plan_service(self, spec, current, item_info):
+        name, service_type, folder = spec.key
+        desired_data = _get_desired_data(spec.definition)
+        cluster = desired_data.get('clusterName')
+        actions = []
+
+        if current is None:
+            actions.append(Action(Action.CREATE, folder, name, service_type, spec.definition, cluster=cluster))
+            if spec.item_info is not None:
+                actions.append(Action(Action.EDIT_ITEM_INFO, folder, name, service_type, spec.item_info))
+            if spec.state == 'STOPPED':
+                actions.append(Action(Action.STOP, folder, name, service_type, cluster=cluster))
+            return actions
+
+        definition = current['definition']
+        current_data = definition.get_data()
+        cluster = cluster or current_data.get('clusterName')
+
+        changes = _diff_desired(current_data, desired_data)
+        if changes:
+            merged = type(definition)()
+            merged.set_from_dictionary(_merge(current_data, desired_data), lazy=True)
+            actions.append(Action(Action.EDIT, folder, name, service_type, merged, changes, cluster))
+
+        if spec.item_info is not None:
+            current_info = item_info.get_data()
+            desired_info = _get_desired_data(spec.item_info)
+            changes = _diff_desired(current_info, desired_info)
+            if changes:
+                merged = type(item_info)()
+                merged.set_from_dictionary(_merge(current_info, desired_info), lazy=True)
+                actions.append(Action(Action.EDIT_ITEM_INFO, folder, name, service_type, merged, changes))
+
+        state = current['status'].configured_state if current.get('status') is not None else None
+        if spec.state == 'STARTED' and state == 'STOPPED':
+            actions.append(Action(Action.START, folder, name, service_type, cluster=cluster))
+        elif spec.state == 'STOPPED' and state == 'STARTED':
+            actions.append(Action(Action.STOP, folder, name, service_type, cluster=cluster))
+
+        return actions
+
+    def plan(self):
+        """Crawls the current state of the server and returns a ``Plan``. The server is not modified."""
+
+        folders, services = self._get_current_state()
+        specs = [s for s in self.manifest.services if s.folder not in self.ignore_folders]
+        item_info = self._get_item_info([s for s in specs if s.item_info is not None and s.key in services])
+
+        actions = []
+        for folder, description in sorted(self.manifest.folders.items()):
+            if folder and folder not in folders and folder not in self.ignore_folders:
+                actions.append(Action(Action.CREATE_FOLDER, folder, data=description))
+
+        for spec in specs:
+            actions += self._plan_service(spec, services.get(spec.key), item_info.get(spec.key))
+
+        if self.prune:
+            desired = set(spec.key for spec in self.manifest.services)
+            for key in sorted(set(services) - desired):
+                actions.append(Action(Action.DELETE, key[2], key[0], key[1]))
+
+        return Plan(actions)
+
+    def _apply_action(self, action, cluster_locks, failed):
+        if action.key in failed or action.folder in failed:
+            action.status = 'skipped'
+            return
+
+        server_admin = self.server_admin
+        service = (action.service_name, action.service_type, action.folder)
+        lock = cluster_locks[action.cluster] if action.action in Action.DISRUPTIVE else None
+
+        try:
+            if lock is not None:
+                lock.acquire()
+            if action.action == Action.CREATE_FOLDER:
+                server_admin.create_folder(action.folder, action.data)
+            elif action.action == Action.CREATE:
+                server_admin.create_service(action.data, action.folder)
+            elif action.action == Action.EDIT:
+                server_admin.edit_service(action.data, *service)
+            elif action.action == Action.EDIT_ITEM_INFO:
+                server_admin.edit_service_item_info(action.data, *service)
+            elif action.action == Action.START:
+                server_admin.start_service(*service)
+            elif action.action == Action.STOP:
+                server_admin.stop_service(*service)
+            elif action.action == Action.DELETE:
+                server_admin.delete_service(*service)
+            action.status = 'done'
+        except Exception as e:
+            action.status = 'failed'
+            action.error = e
+            failed.add(action.key)
+        finally:
+            if lock is not None:
+                lock.release()
+
+    def apply(self, plan=None):
+        """
+        Applies a plan, computing one first if none is given. The status ('done', 'failed', or 'skipped') and error (if
+        any) of each action are recorded on the action. Returns the plan.
+
+        :param plan: plan returned by ``plan`` (optional)
+        """
+
+        if plan is None:
+            plan = self.plan()
+
+        cluster_locks = defaultdict(lambda: threading.BoundedSemaphore(self.max_unavailable))
+        failed = set()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for phase in Action.PHASES:
+                # Create the locks for this phase before any are acquired from worker threads
+                actions = [action for action in plan if action.action == phase]
+                for action in actions:
+                    if action.action in Action.DISRUPTIVE:
+                        cluster_locks[action.cluster]
+                list(executor.map(lambda a: self._apply_action(a, cluster_locks, failed), actions))
+
+        return plan
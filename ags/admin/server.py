@@ -1,25 +1,28 @@
-import json
-import time
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
 
-import requests
-from requests.packages.urllib3 import encode_multipart_formdata
-from requests.utils import to_key_val_list
 from requests.exceptions import ConnectionError as _ConnectionError
 
-from ags.admin.services.base import ServiceStatus
-from ags.admin.services.mapserver import MapServerDefinition
-from ags.admin.uploads import UploadItem
-from ags.exceptions import HTTPError, ServerError, ConnectionError
+from ags.exceptions import HTTPError, ConnectionError
+from ags.multipart import MultipartEncoder
+from ags.session import create_session, DEFAULT_POOL_SIZE
 
-from .paths import AGS_ADMIN_PATH_PATTERNS
-from .services.gp import GPServerDefinition
-from .services.base import ServiceDefinition, ServiceItemInfo
+from .base import BaseServerAdmin
+from .singleflight import SingleFlight
+from .tokens import TokenManager
 
 
-class ServerAdmin(object):
+DEFAULT_MAX_WORKERS = 8
+DEFAULT_PART_SIZE = 16 * 1024 * 1024
+
+
+class ServerAdmin(BaseServerAdmin):
     """A connection to an ArcGIS server admin."""
 
-    def __init__(self, host, username, password, secure=False, admin_root="/arcgis/admin"):
+    def __init__(self, host, username, password, secure=False, admin_root="/arcgis/admin", session=None,
+                 pool_size=DEFAULT_POOL_SIZE, timeout=None, token_margin=60, token_refresh_ahead=300, token_cache=None,
+                 cache=None, coalesce_requests=True, codec=None, lazy_definitions=False, retry_policy=None):
         """
         Create a new connection to an ArcGIS server admin.
 
@@ -28,82 +31,108 @@ class ServerAdmin(object):
         :param password: Admin password
         :param secure: If True, requests will use HTTPS only
         :param admin_root: Root server admin path
-        """
-
-        self.host = host
-        self.username = username
-        self.password = password
-        self.root = admin_root.rstrip('/')
-        self.token = None
-        self.token_expiration = None
-        self.scheme = 'https' if secure else 'http'
-
-    def _post(self, path, data={}, files=None, headers={}, multipart=False):
-        if not self.token or self.token_expiration >= time.time():
-            self.generate_token()
-
+        :param session: HTTP session to use for requests (optional). If not provided, a new connection-pooled session is
+        created for this connection.
+        :param pool_size: maximum number of pooled connections, if a new session is created
+        :param timeout: request timeout in seconds, or a (connect, read) tuple (optional)
+        :param token_margin: tokens are not used within this many seconds of their expiration
+        :param token_refresh_ahead: tokens are refreshed in advance when they expire within this many seconds
+        :param token_cache: cache used to share tokens between processes (optional), e.g., a ``FileTokenCache``
+        :param cache: cache for service listings, definitions, item info, and status (optional), e.g., a
+        ``ResponseCache``. Cached entries are invalidated by operations on this connection which modify them.
+        :param coalesce_requests: if True, identical GET requests made concurrently from several threads are sent once,
+        and all callers receive the result
+        :param codec: JSON codec, or name of a codec (see ``ags.codec.get_codec``). Defaults to the fastest installed.
+        :param lazy_definitions: if True, service definitions are hydrated lazily and losslessly: properties the client
+        does not know about are retained, and nested properties and extensions are decoded to typed objects when first
+        accessed (see ``ags.base.Properties.set_from_dictionary``)
+        :param retry_policy: policy for retrying requests which fail with transient errors, and for failing fast while
+        the server is unhealthy (optional), e.g., an ``ags.retry.RetryPolicy``. Only idempotent requests are retried.
+        """
+
+        super(ServerAdmin, self).__init__(
+            host, username, password, secure, admin_root, timeout, codec, lazy_definitions
+        )
+        self.session = session if session is not None else create_session(pool_size=pool_size)
+        self.token_manager = TokenManager(
+            self._request_token, margin=token_margin, refresh_ahead=token_refresh_ahead, cache=token_cache,
+            cache_key=self._get_token_cache_key()
+        )
+        self.cache = cache
+        self.single_flight = SingleFlight() if coalesce_requests else None
+        self.retry_policy = retry_policy
+
+    def _send(self, fn, idempotent=False):
+        """Calls ``fn``, which makes a request, using the retry policy if there is one."""
+
+        if self.retry_policy is None:
+            return fn()
+        return self.retry_policy.call(self.host, fn, idempotent)
+
+    def _post(self, path, data=None, files=None, headers=None, multipart=False, idempotent=False):
+        # The token is retrieved once, outside of the retried request, so that token requests are not retried again
+        # for each attempt
+        token = self.token_manager.get_token()
+        return self._send(lambda: self._send_post(path, token, data, files, headers, multipart), idempotent)
+
+    def _send_post(self, path, token, data=None, files=None, headers=None, multipart=False):
         try:
-            url, data = self._prepare_request(path, data)
-            if multipart and not files:
-                fields = to_key_val_list(data)
-                new_fields = []
-                for field, val in fields:
-                    if isinstance(val, str) or not hasattr(val, '__iter__'):
-                        val = [val]
-                    for v in val:
-                        if v is not None:
-                            new_fields.append(
-                                (field.decode('utf-8') if isinstance(field, bytes) else field,
-                                 v.encode('utf-8') if isinstance(v, str) else v))
-                body, content_type = encode_multipart_formdata(new_fields)
-                headers.update({
-                    'Content-type': content_type
-                })
-                response = requests.post(url, data=body, headers=headers)
+            url, data = self._prepare_request(path, data, token)
+            headers = dict(headers or {})
+            if multipart or files:
+                # A streamed body can only be read once, so it is created for each attempt
+                body = MultipartEncoder(data, files)
+                headers['Content-Type'] = body.content_type
+                response = self.session.post(url, data=body, headers=headers, timeout=self.timeout)
             else:
-                response = requests.post(url, data=data, files=files, headers=headers)
+                response = self.session.post(url, data=data, headers=headers, timeout=self.timeout)
             return self._process_response(url, response)
         except _ConnectionError as e:
             raise ConnectionError(getattr(e, 'message', e))
 
-    def _get(self, path, data={}, headers={}):
-        if not self.token or self.token_expiration >= time.time():
-            self.generate_token()
-
-        url, data = self._prepare_request(path, data)
-        return self._process_response(url, requests.get(url, params=data, headers=headers))
-
-    def _prepare_request(self, path, data):
-        data.update({
-            'f': "json",
-            'token': self.token
-        })
-        return "%s://%s%s" % (self.scheme, self.host, path), data
-
-    def _process_response(self, url, response):
-        """Internal method to validate and deserialize server response."""
-
-        if response.status_code >= 300 or response.status_code < 200:
-            raise HTTPError("Error loading URL %s. The response was %d (%s)" %
-                            (url, response.status_code, response.reason), response.status_code)
-        elif response.content:
-            try:
-                data = json.loads(response.content, strict=False)
-                if data.get('status', None) == "error":
-                    if data.get('code', None):
-                        raise HTTPError("Error loading URL %s. The response was %d (%s)" % (url, data['code'],
-                                        ",".join(data['messages'])), data['code'])
-                    raise ServerError("ArcGIS server response indicates error: %s" % data['messages'])
-                return data
-            except ValueError:
-                raise ServerError("Error parsing response from server: %s" % response.content)
-
-    def _get_service_path(self, service_name, folder=''):
-        return '/'.join((folder, service_name)).lstrip('/')
-
-    def _get_path(self, name, **kwargs):
-        kwargs['admin_root'] = self.root
-        return AGS_ADMIN_PATH_PATTERNS[name] % kwargs
+    def _get(self, path, data=None, headers=None):
+        if self.single_flight is None or headers:
+            return self._send_get(path, data, headers)
+
+        key = (path, tuple(sorted((k, str(v)) for k, v in (data or {}).items())))
+        return self.single_flight.do(key, lambda: self._send_get(path, data))
+
+    def _send_get(self, path, data=None, headers=None):
+        url, params = self._prepare_request(path, data, self.token_manager.get_token())
+
+        def get():
+            return self._process_response(
+                url, self.session.get(url, params=params, headers=headers, timeout=self.timeout)
+            )
+
+        return self._send(get, idempotent=True)
+
+    def _cached_get(self, endpoint, path):
+        """Returns the response for ``path``, using the response cache if there is one."""
+
+        if self.cache is None:
+            return self._get(path)
+
+        hit, response = self.cache.get(endpoint, path)
+        if not hit:
+            response = self._get(path)
+            self.cache.set(endpoint, path, response)
+        return response
+
+    def _invalidate_folder(self, folder=''):
+        if self.cache is not None:
+            self.cache.invalidate(self._get_path("list_services", folder=folder))
+
+    def _invalidate_service(self, service_name, service_type, folder=''):
+        if self.cache is not None:
+            self._invalidate_folder(folder)
+            self.cache.invalidate_prefix(self._get_path("get_service", service_type=service_type,
+                                                        service_path=self._get_service_path(service_name, folder)))
+
+    def close(self):
+        """Closes all pooled connections held by this server admin connection."""
+
+        self.session.close()
 
     def generate_token(self, duration=None):
         """
@@ -113,24 +142,18 @@ class ServerAdmin(object):
         :param duration: The duration of the generated token in minutes
         """
 
-        path = self._get_path("generate_token")
-        data = {
-            'username': self.username,
-            'password': self.password,
-            'client': "requestip",
-            'f': "json"
-        }
-        if duration is not None:
-            if duration < 1 or duration > 20160:
-                raise ValueError('Duration must be a positive integer in minutes, no greater than 20160 (14 days)')
-            data['expiration'] = duration
+        token, expiration = self._request_token(duration)
+        self.token_manager.set_token(token, expiration)
 
-        url = "%s://%s%s" % (self.scheme, self.host, path)
-        response = self._process_response(url, requests.post(url, data=data))
-        try:
-            self.token, self.token_expiration = response['token'], float(response['expires'] or 0)
-        except KeyError:
-            raise ValueError("ArcGIS server returned an invalid generate token resopnse: %s" % str(response))
+    def _request_token(self, duration=None):
+        """Requests a new token from the server. Returns a (token, expiration) tuple; expiration is in milliseconds."""
+
+        url, data = self._prepare_token_request(duration)
+        response = self._send(
+            lambda: self._process_response(url, self.session.post(url, data=data, timeout=self.timeout)),
+            idempotent=True
+        )
+        return self._parse_token_response(response)
 
     def list_services(self, folder=''):
         """
@@ -141,23 +164,8 @@ class ServerAdmin(object):
         :param folder: folder within which to list services and subfolders.
         """
 
-        response = self._get(self._get_path("list_services", folder=folder))
-        folders = []
-        services = []
-
-        for folder in response.get('foldersDetail', []):
-            folders.append({
-              'name': folder['folderName'],
-              'description': folder['description']
-            })
-        for service in response['services']:
-            services.append({
-                'name': service['serviceName'],
-                'type': service['type'],
-                'description': service['description']
-            })
-
-        return folders, services
+        path = self._get_path("list_services", folder=folder)
+        return self._parse_service_list(self._cached_get("list_services", path))
 
     def service_exists(self, service_name, service_type, folder=''):
         """
@@ -189,6 +197,7 @@ class ServerAdmin(object):
             'description': description
         }
         self._post(self._get_path("create_folder"), data)
+        self._invalidate_folder()
 
     def edit_folder(self, folder_name, description, web_encrypted=False):
         """
@@ -205,6 +214,7 @@ class ServerAdmin(object):
             'webEncrypted': web_encrypted,
         }
         self._post(self._get_path("edit_folder", folder=folder_name), data)
+        self._invalidate_folder()
 
     def delete_folder(self, folder_name):
         """
@@ -214,6 +224,9 @@ class ServerAdmin(object):
         """
 
         self._post(self._get_path("delete_folder", folder=folder_name))
+        self._invalidate_folder()
+        if self.cache is not None:
+            self.cache.invalidate_prefix(self._get_path("list_services", folder=folder_name))
 
     def get_service(self, service_name, service_type, folder=''):
         """
@@ -224,21 +237,10 @@ class ServerAdmin(object):
         :param folder: folder path containing the service
         """
 
-        response = self._get(self._get_path("get_service", service_path=self._get_service_path(service_name, folder),
-                                           service_type=service_type))
-
-        if service_type == "GPServer":
-            service = GPServerDefinition(service_name=service_name)
-        elif service_type == "MapServer":
-            service = MapServerDefinition(service_name=service_name)
-        else:
-            service = ServiceDefinition(
-                service_name=service_name,
-                type=service_type
-            )
-
-        service.set_from_dictionary(response)
-        return service
+        path = self._get_path("get_service", service_path=self._get_service_path(service_name, folder),
+                              service_type=service_type)
+        response = self._cached_get("get_service", path)
+        return self._create_service_definition(service_name, service_type, response, folder)
 
     def create_service(self, service, folder=None):
         """
@@ -248,18 +250,10 @@ class ServerAdmin(object):
         :param folder: folder to create the service within (optional)
         """
 
-        if folder:
-            if folder[0] != "/":
-                folder = "/" + folder
-            path = self._get_path("create_service", folder=folder)
-        else:
-            path = self._get_path("create_service", folder="")
-        data = {
-            'service': json.dumps(service.get_data())
-        }
-        self._post(path, data)
+        self._post(self._get_create_service_path(folder), self._serialize_service(service))
+        self._invalidate_folder((folder or '').strip('/'))
 
-    def edit_service(self, service, service_name, service_type, folder=''):
+    def edit_service(self, service, service_name, service_type, folder='', force=False):
         """
         Modifies the given service on this ArcGIS server.
 
@@ -267,15 +261,24 @@ class ServerAdmin(object):
         :param service_name: service name
         :param service_type: service type
         :param folder: folder path containing the service
+        :param force: if True, the service is edited even if its definition has not changed
+        :return: list of the paths of changed values (e.g., 'properties.maxRecordCount'), compared to the definition as
+        it was retrieved from the server, or all properties if it was not. If the list is empty, the service was not
+        changed and no request was made (unless ``force`` is True). ArcGIS server restarts a service whenever it is
+        edited.
 
         """
 
         path = self._get_path("edit_service", service_path=self._get_service_path(service_name, folder),
                              service_type=service_type)
-        data = {
-            'service': json.dumps(service.get_data())
-        }
+        data, changes = self._prepare_service_edit(service, service_name, service_type, folder, force)
+        if data is None:
+            return changes
+
         self._post(path, data)
+        self._invalidate_service(service_name, service_type, folder)
+        self._mark_service_clean(service, data, service_name, service_type, folder)
+        return changes
 
     def get_service_item_info(self, service_name, service_type, folder=''):
         """
@@ -289,10 +292,7 @@ class ServerAdmin(object):
 
         path = self._get_path("get_service_item_info", service_path=self._get_service_path(service_name, folder),
                              service_type=service_type)
-        response = self._get(path)
-        info = ServiceItemInfo()
-        info.set_from_dictionary(response)
-        return info
+        return self._create_service_item_info(self._cached_get("get_service_item_info", path))
 
     def edit_service_item_info(self, info, service_name, service_type, folder=''):
         """
@@ -306,10 +306,8 @@ class ServerAdmin(object):
 
         path = self._get_path("edit_service_item_info", service_path=self._get_service_path(service_name, folder),
                              service_type=service_type)
-        data = {
-            'serviceItemInfo': json.dumps(info.get_data())
-        }
-        self._post(path, data, files={'thumbnail': ""})
+        self._post(path, self._serialize_service_item_info(info), files={'thumbnail': ""})
+        self._invalidate_service(service_name, service_type, folder)
 
     def get_service_status(self, service_name, service_type, folder=''):
         """
@@ -320,12 +318,24 @@ class ServerAdmin(object):
         :param folder: folder path containing the service
         """
 
-        response = self._get(self._get_path("get_service_status",
-                                           service_path=self._get_service_path(service_name, folder),
-                                           service_type=service_type))
-        status = ServiceStatus()
-        status.set_from_dictionary(response)
-        return status
+        path = self._get_path("get_service_status", service_path=self._get_service_path(service_name, folder),
+                              service_type=service_type)
+        response = self._cached_get("get_service_status", path)
+        return self._create_service_status(response)
+
+    def get_folder_report(self, folder='', include_definitions=False):
+        """
+        Retrieves the status, and optionally the definitions, of all services in a folder with a single request. Returns
+        a dictionary mapping each (service_name, service_type, folder) tuple to a dictionary in the form
+        {'status': ServiceStatus, 'definition': ServiceDefinition}. The definition is None unless
+        ``include_definitions`` is True, and only includes the properties provided by the report.
+
+        :param folder: folder containing the services (defaults to the root folder)
+        :param include_definitions: if True, service descriptions and properties are included
+        """
+
+        response = self._get(self._get_folder_report_path(folder), self._get_folder_report_params(include_definitions))
+        return self._parse_folder_report(folder, response, include_definitions)
 
     def start_service(self, service_name, service_type, folder=''):
         """
@@ -336,7 +346,8 @@ class ServerAdmin(object):
         :param folder: folder path containing the service"""
 
         self._post(self._get_path("start_service", service_path=self._get_service_path(service_name, folder),
-                                 service_type=service_type))
+                                 service_type=service_type), idempotent=True)
+        self._invalidate_service(service_name, service_type, folder)
 
     def stop_service(self, service_name, service_type, folder=''):
         """
@@ -348,7 +359,8 @@ class ServerAdmin(object):
         """
 
         self._post(self._get_path("stop_service", service_path=self._get_service_path(service_name, folder),
-                                 service_type=service_type))
+                                 service_type=service_type), idempotent=True)
+        self._invalidate_service(service_name, service_type, folder)
 
     def delete_service(self, service_name, service_type, folder=''):
         """
@@ -361,6 +373,7 @@ class ServerAdmin(object):
 
         self._post(self._get_path("delete_service", service_path=self._get_service_path(service_name, folder),
                                  service_type=service_type))
+        self._invalidate_service(service_name, service_type, folder)
 
     def upload_item(self, file_or_path, description):
         """
@@ -377,6 +390,189 @@ class ServerAdmin(object):
 
         path = self._get_path("upload_item")
         response = self._post(path, data={'description': description}, files={'itemFile': file_obj})
-        item = UploadItem()
-        item.set_from_dictionary(response['item'])
-        return item
+        return self._create_upload_item(response)
+
+    def register_upload(self, name, description=''):
+        """
+        Registers a new item to be uploaded in parts. Use the ID of the returned item with ``upload_item_in_parts``.
+
+        :param name: item (file) name
+        :param description: description of item
+        :return: upload item object
+        """
+
+        response = self._post(self._get_path("register_upload"), {'itemName': name, 'description': description})
+        return self._create_upload_item(response)
+
+    def get_upload_item(self, item_id):
+        """
+        Retrieves information about an uploaded item.
+
+        :param item_id: upload item ID
+        :return: upload item object
+        """
+
+        return self._create_upload_item(self._get(self._get_path("get_upload_item", item_id=item_id)))
+
+    def get_upload_parts(self, item_id):
+        """
+        Returns a sorted list of the part numbers which have been uploaded for the given item.
+
+        :param item_id: upload item ID
+        """
+
+        response = self._get(self._get_path("get_upload_parts", item_id=item_id))
+        return sorted(int(part) for part in response.get('parts', []))
+
+    def upload_item_in_parts(self, file_or_path, description='', item_id=None, part_size=DEFAULT_PART_SIZE,
+                             max_workers=4, progress=None):
+        """
+        Uploads a large file in parts, several parts at a time, then commits the upload. If ``item_id`` is given, parts
+        already uploaded for that item are skipped, so an interrupted upload can be resumed by calling this method again
+        with the same item ID (as returned by ``register_upload``).
+
+        :param file_or_path: seekable file-like object or path to a file
+        :param description: description of file (used if registering a new item)
+        :param item_id: ID of a registered upload item (optional). If not given, a new item is registered.
+        :param part_size: size of each part in bytes
+        :param max_workers: maximum number of parts to upload at once
+        :param progress: callable (optional) which is called as ``progress(bytes_uploaded, total_bytes)`` after each
+        part
+        :return: committed upload item object
+        """
+
+        if isinstance(file_or_path, str):
+            file_obj = open(file_or_path, 'rb')
+            name = os.path.basename(file_or_path)
+        else:
+            file_obj = file_or_path
+            name = os.path.basename(getattr(file_or_path, 'name', 'upload'))
+
+        try:
+            file_obj.seek(0, os.SEEK_END)
+            total = file_obj.tell()
+            part_count = max((total + part_size - 1) // part_size, 1)
+
+            if item_id is None:
+                item_id = self.register_upload(name, description).id
+                uploaded = set()
+            else:
+                uploaded = set(self.get_upload_parts(item_id))
+
+            progress_lock = threading.Lock()
+            read_lock = threading.Lock()
+            state = {'bytes': sum(min(part_size, total - (n - 1) * part_size) for n in uploaded if n <= part_count)}
+
+            def upload_part(number):
+                with read_lock:
+                    file_obj.seek((number - 1) * part_size)
+                    content = file_obj.read(part_size)
+
+                # Uploading a part again replaces it, so part uploads may be retried
+                path = self._get_path("upload_part", item_id=item_id)
+                self._post(path, {'partNumber': number}, files={'partFile': ("%s.part%d" % (name, number), content)},
+                           idempotent=True)
+
+                if progress is not None:
+                    with progress_lock:
+                        state['bytes'] += len(content)
+                        progress(state['bytes'], total)
+
+            remaining = [n for n in range(1, part_count + 1) if n not in uploaded]
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                # Only keep a limited number of parts in progress, so that memory use is bounded by the part size
+                futures = set()
+                try:
+                    for number in remaining:
+                        if len(futures) >= max_workers:
+                            done, futures = wait(futures, return_when=FIRST_COMPLETED)
+                            for future in done:
+                                future.result()
+                        futures.add(executor.submit(upload_part, number))
+                    for future in as_completed(futures):
+                        future.result()
+                except Exception:
+                    for future in futures:
+                        future.cancel()
+                    raise
+        finally:
+            if file_obj is not file_or_path:
+                file_obj.close()
+
+        parts = ",".join(str(n) for n in range(1, part_count + 1))
+        self._post(self._get_path("commit_upload", item_id=item_id), {'parts': parts})
+        return self.get_upload_item(item_id)
+
+    def _map_services(self, method, services, max_workers):
+        """
+        Calls ``method`` for each service, using up to ``max_workers`` threads. Returns a dictionary mapping each
+        (service_name, service_type, folder) tuple to the result of the call, or to the exception it raised.
+        """
+
+        services = [(s[0], s[1], s[2] if len(s) > 2 else '') for s in services]
+        results = {}
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {executor.submit(method, *service): service for service in services}
+            for future in as_completed(futures):
+                try:
+                    results[futures[future]] = future.result()
+                except Exception as e:
+                    results[futures[future]] = e
+
+        return results
+
+    def get_services(self, services, max_workers=DEFAULT_MAX_WORKERS):
+        """
+        Retrieves several service definitions from this ArcGIS server in parallel. Returns a dictionary mapping each
+        (service_name, service_type, folder) tuple to its service definition, or to the exception raised retrieving it.
+
+        :param services: list of (service_name, service_type, folder) tuples
+        :param max_workers: maximum number of requests to make at once
+        """
+
+        return self._map_services(self.get_service, services, max_workers)
+
+    def get_service_statuses(self, services, max_workers=DEFAULT_MAX_WORKERS):
+        """
+        Gets the status info for several services on this ArcGIS server in parallel. Returns a dictionary mapping each
+        (service_name, service_type, folder) tuple to its status, or to the exception raised retrieving it.
+
+        :param services: list of (service_name, service_type, folder) tuples
+        :param max_workers: maximum number of requests to make at once
+        """
+
+        return self._map_services(self.get_service_status, services, max_workers)
+
+    def start_services(self, services, max_workers=DEFAULT_MAX_WORKERS):
+        """
+        Starts several services on this ArcGIS server in parallel. Returns a dictionary mapping each
+        (service_name, service_type, folder) tuple to None if the service was started, or to the exception raised.
+
+        :param services: list of (service_name, service_type, folder) tuples
+        :param max_workers: maximum number of requests to make at once
+        """
+
+        return self._map_services(self.start_service, services, max_workers)
+
+    def stop_services(self, services, max_workers=DEFAULT_MAX_WORKERS):
+        """
+        Stops several services on this ArcGIS server in parallel. Returns a dictionary mapping each
+        (service_name, service_type, folder) tuple to None if the service was stopped, or to the exception raised.
+
+        :param services: list of (service_name, service_type, folder) tuples
+        :param max_workers: maximum number of requests to make at once
+        """
+
+        return self._map_services(self.stop_service, services, max_workers)
+
+    def delete_services(self, services, max_workers=DEFAULT_MAX_WORKERS):
+        """
+        Deletes several services on this ArcGIS server in parallel. Returns a dictionary mapping each
+        (service_name, service_type, folder) tuple to None if the service was deleted, or to the exception raised.
+
+        :param services: list of (service_name, service_type, folder) tuples
+        :param max_workers: maximum number of requests to make at once
+        """
+
+        return self._map_services(self.delete_service, services, max_workers)
@@ -38,6 +38,13 @@ class ServiceDefinition(Properties):
         })
         return props
 
+    def get_property_types(self):
+        types = super(ServiceDefinition, self).get_property_types()
+        types.update({
+            'extensions': [ServiceExtension]
+        })
+        return types
+
 
 class ServiceItemInfo(Properties):
     """Service iteminfo"""
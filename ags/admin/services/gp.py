@@ -22,8 +22,12 @@ class GPServerProperties(Properties):
 
 class GPServerDefinition(ServiceDefinition):
     def __init__(self, **kwargs):
-        kwargs.update({
-            'type': "GPServer",
-            'properties': GPServerProperties()
+        super(GPServerDefinition, self).__init__(**kwargs)
+        self._set_defaults(type="GPServer", properties=GPServerProperties())
+
+    def get_property_types(self):
+        types = super(GPServerDefinition, self).get_property_types()
+        types.update({
+            'properties': GPServerProperties
         })
-        super(GPServerDefinition, self).__init__(**kwargs)
\ No newline at end of file
+        return types
\ No newline at end of file
@@ -12,6 +12,7 @@ class DynamicDataWorkspaceDefinition(Properties):
             'workspace_factory': "WorkspaceFactory",
             'workspace_connection': "workspaceConnection"
         })
+        return data
 
 
 class MapServerProperties(Properties):
@@ -47,14 +48,24 @@ class MapServerProperties(Properties):
         })
         return data
 
+    def get_property_types(self):
+        types = super(MapServerProperties, self).get_property_types()
+        types.update({
+            'dynamic_data_workspaces': [DynamicDataWorkspaceDefinition]
+        })
+        return types
+
 
 class MapServerDefinition(ServiceDefinition):
     """MapServerDefinition"""
 
     def __init__(self, **kwargs):
-        kwargs.update({
-            'type': "MapServer",
-            'capabilities': "Map,Query,Data",
-            'properties': MapServerProperties()
+        super(MapServerDefinition, self).__init__(**kwargs)
+        self._set_defaults(type="MapServer", capabilities="Map,Query,Data", properties=MapServerProperties())
+
+    def get_property_types(self):
+        types = super(MapServerDefinition, self).get_property_types()
+        types.update({
+            'properties': MapServerProperties
         })
-        super(MapServerDefinition, self).__init__(**kwargs)
\ No newline at end of file
+        return types
\ No newline at end of file
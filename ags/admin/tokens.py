@@ -0,0 +1,290 @@
+import asyncio
+import getpass
+import hashlib
+import json
+import logging
+import os
+import stat
+import tempfile
+import threading
+import time
+
+
+logger = logging.getLogger(__name__)
+
+
+class TokenManager(object):
+    """
+    Caches an ArcGIS server token and refreshes it ahead of its expiration.
+
+    Only one thread will request a new token at a time; other threads either continue using the current token (if it
+    is still usable) or wait for the refresh to complete.
+    """
+
+    def __init__(self, generate, margin=60, refresh_ahead=300, cache=None, cache_key=None):
+        """
+        :param generate: callable which requests a new token and returns a (token, expiration) tuple, where expiration
+        is in milliseconds since the epoch (as returned by the server), or None if unknown
+        :param margin: tokens are not used if they expire within this many seconds
+        :param refresh_ahead: tokens which expire within this many seconds are refreshed by the first caller to notice,
+        while other callers continue to use the current token
+        :param cache: shared token cache (optional), for example a ``FileTokenCache``
+        :param cache_key: key identifying this server and user in the shared cache
+        """
+
+        self.generate = generate
+        self.margin = margin
+        self.refresh_ahead = max(refresh_ahead, margin)
+        self.cache = cache
+        self.cache_key = cache_key
+        self._state = (None, None)
+        self._lock = threading.Lock()
+
+    @property
+    def token(self):
+        return self._state[0]
+
+    @property
+    def expiration(self):
+        return self._state[1]
+
+    def _remaining(self, state):
+        """Returns the number of seconds for which the token is valid, or None if the expiration is unknown."""
+
+        token, expiration = state
+        if not token:
+            return 0
+        if not expiration:
+            return None
+        return expiration / 1000.0 - time.time()
+
+    def _is_usable(self, state):
+        remaining = self._remaining(state)
+        return remaining is None or remaining > self.margin
+
+    def get_token(self):
+        """Returns a valid token, requesting a new one if necessary."""
+
+        state = self._state
+        remaining = self._remaining(state)
+        if remaining is None or remaining > self.refresh_ahead:
+            return state[0]
+
+        if remaining > self.margin:
+            # The current token is still usable; refresh only if no other thread is already doing so
+            if self._lock.acquire(False):
+                try:
+                    return self._refresh(force=False)
+                except Exception:
+                    # Refreshing early is opportunistic; the next caller will try again
+                    return state[0]
+                finally:
+                    self._lock.release()
+            return state[0]
+
+        with self._lock:
+            return self._refresh(force=False)
+
+    def refresh(self):
+        """Requests a new token, regardless of whether the current token is still valid."""
+
+        with self._lock:
+            return self._refresh(force=True)
+
+    def _refresh(self, force):
+        """Must be called with the lock held."""
+
+        if not force:
+            token = self._reuse()
+            if token:
+                return token
+
+        token, expiration = self.generate()
+        self.set_token(token, expiration)
+        return token
+
+    def _reuse(self):
+        """
+        Returns the current or cached token if it does not need to be refreshed, otherwise None. Must be called with
+        the lock held.
+        """
+
+        remaining = self._remaining(self._state)
+        if remaining is None or remaining > self.refresh_ahead:
+            # Another caller refreshed the token while we were waiting for the lock
+            return self._state[0]
+
+        if self.cache is not None:
+            cached = self.cache.get(self.cache_key)
+            if cached and self._is_usable(cached):
+                self._state = tuple(cached)
+                remaining = self._remaining(self._state)
+                if remaining is None or remaining > self.refresh_ahead:
+                    return self._state[0]
+
+        return None
+
+    def set_token(self, token, expiration):
+        """
+        Sets the current token.
+
+        :param token: token string
+        :param expiration: expiration in milliseconds since the epoch, or None if unknown
+        """
+
+        self._state = (token, expiration or None)
+        if self.cache is not None:
+            try:
+                self.cache.set(self.cache_key, token, expiration or None)
+            except OSError as e:
+                # The shared cache is only an optimization; the token is still used by this process
+                logger.warning("Could not store token in cache: %s", e)
+
+    def invalidate(self):
+        """Discards the current token, so that a new token is requested on next use."""
+
+        self._state = (None, None)
+        if self.cache is not None:
+            self.cache.delete(self.cache_key)
+
+
+class AsyncTokenManager(TokenManager):
+    """
+    Token manager for use with asyncio. ``generate`` must be a coroutine function. Only one task will request a new
+    token at a time.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super(AsyncTokenManager, self).__init__(*args, **kwargs)
+        self._async_lock = asyncio.Lock()
+
+    async def get_token(self):
+        """Returns a valid token, requesting a new one if necessary."""
+
+        state = self._state
+        remaining = self._remaining(state)
+        if remaining is None or remaining > self.refresh_ahead:
+            return state[0]
+
+        if remaining > self.margin and self._async_lock.locked():
+            return state[0]
+
+        async with self._async_lock:
+            try:
+                return await self._refresh_async(force=False)
+            except Exception:
+                if remaining > self.margin:
+                    return state[0]
+                raise
+
+    async def refresh(self):
+        """Requests a new token, regardless of whether the current token is still valid."""
+
+        async with self._async_lock:
+            return await self._refresh_async(force=True)
+
+    async def _refresh_async(self, force):
+        if not force:
+            token = self._reuse()
+            if token:
+                return token
+
+        token, expiration = await self.generate()
+        self.set_token(token, expiration)
+        return token
+
+
+class FileTokenCache(object):
+    """
+    Stores tokens on disk, so that they may be shared by many (short-lived) processes on the same machine. Tokens are
+    written atomically to files readable only by the current user.
+
+    The directory must be owned by the current user and accessible only by them (mode 0700); it is created that way
+    if it does not exist. Otherwise, tokens are neither read from nor written to it, since other users could replace
+    them.
+    """
+
+    def __init__(self, directory=None):
+        """
+        :param directory: directory in which to store tokens. Defaults to a directory for the current user in the
+        system temp directory.
+        """
+
+        if directory is None:
+            directory = os.path.join(tempfile.gettempdir(), "python-ags-tokens-%s" % self._get_user())
+        self.directory = directory
+
+    @staticmethod
+    def _get_user():
+        if hasattr(os, 'getuid'):
+            return str(os.getuid())
+        return getpass.getuser()
+
+    def _is_secure(self):
+        """Returns True if the directory exists, and is owned by and accessible only by the current user."""
+
+        try:
+            st = os.lstat(self.directory)
+        except OSError:
+            return False
+        if not stat.S_ISDIR(st.st_mode):
+            return False
+        if not hasattr(os, 'getuid'):
+            # Ownership and permission bits are not meaningful on this platform
+            return True
+        return st.st_uid == os.getuid() and not st.st_mode & 0o077
+
+    def _check_directory(self):
+        """Creates the directory if it does not exist, and raises ``PermissionError`` if it is not secure."""
+
+        try:
+            os.makedirs(self.directory, 0o700)
+        except OSError:
+            if not os.path.isdir(self.directory):
+                raise
+        if not self._is_secure():
+            raise PermissionError(
+                "Token cache directory %s must be owned by the current user, with mode 0700" % self.directory
+            )
+
+    @staticmethod
+    def make_key(*parts):
+        """Returns a cache key for the given parts (e.g., scheme, host, admin root, and username)."""
+
+        return hashlib.sha1("|".join(str(p) for p in parts).encode('utf-8')).hexdigest()
+
+    def _get_filename(self, key):
+        return os.path.join(self.directory, "%s.json" % key)
+
+    def get(self, key):
+        """Returns a (token, expiration) tuple for the given key, or None if no token is cached."""
+
+        if not self._is_secure():
+            return None
+        try:
+            with open(self._get_filename(key), 'r') as f:
+                data = json.load(f)
+            return data['token'], data['expiration']
+        except (IOError, OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def set(self, key, token, expiration):
+        self._check_directory()
+
+        fd, tmp_filename = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump({'token': token, 'expiration': expiration}, f)
+            os.replace(tmp_filename, self._get_filename(key))
+        except Exception:
+            if os.path.exists(tmp_filename):
+                os.remove(tmp_filename)
+            raise
+
+    def delete(self, key):
+        if not self._is_secure():
+            return
+        try:
+            os.remove(self._get_filename(key))
+        except OSError:
+            pass
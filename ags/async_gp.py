@@ -0,0 +1,241 @@
+import asyncio
+import hashlib
+import os
+from functools import partial
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+from ags.exceptions import ConnectionError
+from ags.gp import DOWNLOAD_CHUNK_SIZE, GPError, GPTask
+from ags.session import DEFAULT_POOL_SIZE
+
+
+class AsyncGPTask(GPTask):
+    """
+    asyncio client interface to execute a geoprocessing task. ``submit_job``, ``poll``, ``cancel``, and ``execute`` are
+    coroutines; waiting between polls does not block the event loop. Output files of results are downloaded with the
+    ``download_result`` and ``download_all`` coroutines (``GPResult.download`` cannot be used with this task). Requires
+    `aiohttp <https://docs.aiohttp.org/>`_.
+    """
+
+    def __init__(self, url, parameters={}, token=None, session=None, timeout=None, polling=None, upload_threshold=None,
+                 compress=False, codec=None, retry_policy=None):
+        """
+
+        :param url: url of geoprocessing tool
+        :param parameters: dictionary containing input parameters for tool
+        :param token: authorization token generated by server, if required
+        :param session: ``aiohttp.ClientSession`` to use for requests (optional). Tasks on the same server may share a
+        session to share its connection pool. If not provided, a new session is created on first use.
+        :param timeout: total request timeout in seconds (optional)
+        :param polling: strategy used to wait between status requests while blocking (see ``ags.polling``). Defaults
+        to polling once per second.
+        :param upload_threshold: size in bytes above which an input parameter is uploaded to the service (which must
+        have uploads enabled) and passed by its item ID, rather than sent in the request body (optional)
+        :param compress: if True, request bodies are gzip-compressed. Only use this if the server (or a proxy in front
+        of it) accepts compressed request bodies.
+        :param codec: JSON codec, or name of a codec (see ``ags.codec.get_codec``). Defaults to the fastest installed.
+        :param retry_policy: policy for retrying requests which fail with transient errors, and for failing fast while
+        the server is unhealthy (optional), e.g., an ``ags.retry.RetryPolicy``. Only status, result, and cancel requests
+        are retried; submitting or executing the task is not.
+        """
+
+        if aiohttp is None:
+            raise ImportError("AsyncGPTask requires aiohttp")
+
+        self._owns_session = session is None
+        super(AsyncGPTask, self).__init__(
+            url, parameters, token, session=session, timeout=timeout, polling=polling,
+            upload_threshold=upload_threshold, compress=compress, codec=codec, retry_policy=retry_policy
+        )
+
+    def _create_session(self):
+        # The aiohttp session must be created within the event loop, so this is deferred until first use
+        return None
+
+    def _get_session(self):
+        if self.session is None:
+            self.session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=DEFAULT_POOL_SIZE),
+                timeout=aiohttp.ClientTimeout(total=self.timeout)
+            )
+        return self.session
+
+    def _get_download_session(self):
+        raise GPError("Results of an AsyncGPTask are downloaded with its download_result or download_all coroutines")
+
+    async def close(self):
+        """Closes the HTTP session, if it was created by this task."""
+
+        if self._owns_session and self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def _request(self, method, url, **kwargs):
+        try:
+            async with self._get_session().request(method, url, cookies=self._get_cookies(), **kwargs) as r:
+                return self._parse_response(r.status, await r.read())
+        except aiohttp.ClientConnectionError as e:
+            raise ConnectionError(str(e))
+
+    async def _send(self, fn, idempotent=False):
+        """Awaits ``fn()``, which makes a request, using the retry policy if there is one."""
+
+        if self.retry_policy is None:
+            return await fn()
+        return await self.retry_policy.call_async(self._get_retry_host(), fn, idempotent)
+
+    def _get_upload_body(self, name, value):
+        form = aiohttp.FormData()
+        form.add_field('f', "json")
+        form.add_field('description', name)
+        form.add_field('file', value, filename="%s.json" % name, content_type="application/json")
+        return form
+
+    async def _upload_parameter(self, name, value):
+        return await self._request('POST', self._get_upload_url(), data=self._get_upload_body(name, value))
+
+    async def _upload_parameters_async(self, data):
+        for name in self._get_uploads(data):
+            response = await self._send(partial(self._upload_parameter, name, data[name]))
+            data[name] = self._handle_upload_response(response)
+        return data
+
+    async def _post_task(self, url):
+        body, headers = self._encode_request(await self._upload_parameters_async(self._get_request_data()))
+        return await self._send(partial(self._request, 'POST', url, data=body, headers=headers))
+
+    async def submit_job(self, blocking=False, timeout=None):
+        """
+        Submit the task for asynchronous processing.
+
+        :param blocking: If True, this call will continue to poll until the job is complete.
+        :param timeout: maximum number of seconds to wait for the job to complete, if blocking. Defaults to the timeout
+        of the polling strategy.
+        """
+
+        self.synchronous = False
+        self.poll_count = 0
+        self.results = {}
+        self._handle_submit_response(await self._post_task("%s/submitJob" % self.url))
+        return await self.poll(blocking=blocking, timeout=timeout)
+
+    async def poll(self, blocking=False, timeout=None):
+        """
+        Poll job status. The number of status requests made for the job is kept in ``poll_count``. Results are
+        retrieved once, concurrently, when the job has succeeded.
+
+        :param blocking: If True, this call will continue to poll until the job is complete.
+        :param timeout: maximum number of seconds to wait for the job to complete, if blocking. Defaults to the timeout
+        of the polling strategy. If the job does not complete in time, ``GPTimeoutError`` is raised.
+        """
+
+        intervals = self.polling.intervals()
+        deadline, timeout = self._get_deadline(timeout)
+
+        while True:
+            data = await self._send(partial(self._request, 'GET', self._get_status_url()), idempotent=True)
+            self.poll_count += 1
+            results = self._handle_status_response(data)
+            if self._needs_results():
+                await self._populate_results_async(results)
+            if not blocking or self.is_complete():
+                return self.status
+            await asyncio.sleep(self._get_poll_interval(intervals, deadline, timeout))
+
+    async def cancel(self):
+        """Requests cancellation of the submitted job. Returns the job status reported by the server."""
+
+        url = "%s/jobs/%s/cancel" % (self.url, self.job_id)
+        data = await self._send(partial(self._request, 'POST', url, data={'f': "json"}), idempotent=True)
+        self._handle_cancel_response(data)
+        return self.status
+
+    async def execute(self):
+        """Submit the task for synchronous processing."""
+
+        self.synchronous = True
+        self._handle_execute_response(await self._post_task("%s/execute" % self.url))
+        return self.status
+
+    async def _populate_results_async(self, results):
+        self.results = {}
+        if isinstance(results, dict):
+            responses = await asyncio.gather(*[
+                self._send(partial(self._request, 'GET', self._get_result_url(v['paramUrl'])), idempotent=True)
+                for v in results.values()
+            ])
+            for data in responses:
+                self.results[data['paramName']] = self._create_result(data)
+
+    async def download_result(self, result, path_or_file, chunk_size=DOWNLOAD_CHUNK_SIZE, resume=False, checksum=None,
+                              expected_checksum=None):
+        """
+        Downloads the output file of a file or raster result of this task, streaming it to disk in chunks. Equivalent
+        to ``GPResult.download``, except that files are always downloaded with a single request.
+
+        :param result: ``GPResult`` of this task
+        :param path_or_file: path to which the file is written, or a writable file-like object
+        :param chunk_size: number of bytes read and written at a time
+        :param resume: if True, and ``path_or_file`` is a path to a partially downloaded file, only the remainder of the
+        file is requested (if the server supports range requests)
+        :param checksum: name of a ``hashlib`` algorithm (e.g., 'sha256'). If provided, the hex digest of the downloaded
+        file is returned.
+        :param expected_checksum: if provided, the digest is compared to this value and ``GPError`` is raised if they
+        differ
+        """
+
+        result._check_download(checksum, expected_checksum)
+
+        is_path = isinstance(path_or_file, str)
+        offset = os.path.getsize(path_or_file) if is_path and resume and os.path.exists(path_or_file) else 0
+        headers = {'Range': "bytes=%d-" % offset} if offset else None
+        hasher = hashlib.new(checksum) if checksum and not is_path else None
+
+        try:
+            async with self._get_session().get(result.url, headers=headers, cookies=self._get_cookies()) as r:
+                # 416: the requested range starts at the end of the file; it is already complete
+                if not (offset and r.status == 416):
+                    if r.status not in (200, 206):
+                        raise GPError("Server returned HTTP %d" % r.status, r.status)
+                    # If the server ignored the range request, start over
+                    f = open(path_or_file, 'ab' if offset and r.status == 206 else 'wb') if is_path else path_or_file
+                    try:
+                        async for chunk in r.content.iter_chunked(chunk_size):
+                            f.write(chunk)
+                            if hasher is not None:
+                                hasher.update(chunk)
+                    finally:
+                        if is_path:
+                            f.close()
+        except aiohttp.ClientConnectionError as e:
+            raise ConnectionError(str(e))
+
+        if not checksum:
+            return None
+        digest = result._get_file_digest(path_or_file, checksum, chunk_size) if is_path else hasher.hexdigest()
+        result._verify_checksum(digest, expected_checksum)
+        return digest
+
+    async def download_all(self, directory, max_workers=4, **kwargs):
+        """
+        Downloads the output files of all file and raster results to a directory, several at a time. Files are named
+        after the last part of their URL. Returns a dictionary mapping result names to downloaded file paths.
+
+        :param directory: directory to which files are written
+        :param max_workers: maximum number of files to download at once
+        :param kwargs: additional arguments passed to ``download_result``
+        """
+
+        downloads = self._get_downloads(directory)
+        semaphore = asyncio.Semaphore(max_workers)
+
+        async def download(result, path):
+            async with semaphore:
+                await self.download_result(result, path, **kwargs)
+
+        await asyncio.gather(*[download(result, path) for result, path in downloads.values()])
+        return {name: path for name, (result, path) in downloads.items()}
@@ -1,41 +1,178 @@
-class Properties(object):
-    """Base class for organizing and serializing service/server/description properties."""
+from types import MappingProxyType
 
-    _data = {}
-    _attr_name_map = {}
-    _ags_name_map = {}
+
+class _Unset(object):
+    """Marks a value which has not yet been decoded from the original mapping."""
+
+    __slots__ = ()
+
+    def __repr__(self):
+        return '<unset>'
+
+    def __reduce__(self):
+        # Copies and pickles refer to the same instance
+        return '_UNSET'
+
+
+_UNSET = _Unset()
+
+# Maximum number of distinct sets of dictionary keys remembered for each class
+MAX_KEY_SETS = 64
+
+
+class _Property(object):
+    """Descriptor for a property, stored at a fixed index of the instance's list of values."""
+
+    __slots__ = ('index',)
+
+    def __init__(self, index):
+        self.index = index
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        value = instance._values[self.index]
+        if value is _UNSET:
+            value = instance._decode(self.index)
+        return value
+
+    def __set__(self, instance, value):
+        instance._values[self.index] = value
+        dirty = instance._dirty
+        if dirty is None:
+            instance._dirty = {self.index}
+        elif isinstance(dirty, frozenset):
+            # Shared with other instances (see ``Properties.set_from_dictionary``)
+            instance._dirty = dirty | {self.index}
+        else:
+            dirty.add(self.index)
+
+
+class PropertiesMeta(type):
+    """
+    Metaclass for ``Properties``. Subclasses are given empty ``__slots__``, so instances have no ``__dict__`` and store
+    only a list of values.
+    """
+
+    def __new__(mcs, name, bases, namespace):
+        namespace.setdefault('__slots__', ())
+        return super(PropertiesMeta, mcs).__new__(mcs, name, bases, namespace)
+
+
+class Properties(object, metaclass=PropertiesMeta):
+    """
+    Base class for organizing and serializing service/server/description properties.
+
+    The schema returned by ``get_properties`` is compiled once per class, when the class is first instantiated, into
+    shared name maps, default values, and a descriptor for each property.
+
+    Properties can be hydrated lazily and losslessly (see ``set_from_dictionary``): the original mapping is kept, each
+    value is decoded when it is first accessed, and values of types given by ``get_property_types`` are decoded to
+    typed objects.
+
+    Properties which are set are tracked, so that unchanged objects can be detected without comparing their data (see
+    ``has_changes`` and ``mark_clean``).
+    """
+
+    __slots__ = ('_values', '_raw', '_dirty', '_snapshot')
+
+    def __new__(cls, *args, **kwargs):
+        if '_indexes' not in cls.__dict__:
+            cls._compile_schema()
+        return super(Properties, cls).__new__(cls)
 
     def __init__(self, **kwargs):
-        self.__dict__['_data'] = {}
-        self.__dict__['_attr_name_map'] = {}
-        self.__dict__['_ags_name_map'] = {}
-        for k, v in self.get_properties().items():
-            if isinstance(v, str):
-                self.__dict__['_data'][k] = None
-                self.__dict__['_attr_name_map'][k] = v
-                self.__dict__['_ags_name_map'][v] = k
-            else:
-                self.__dict__['_data'][k] = v[1]
-                self.__dict__['_attr_name_map'][k] = v[0]
-                self.__dict__['_ags_name_map'][v[0]] = k
+        cls = type(self)
+        values = list(cls._defaults)
+        for i in cls._mutable_defaults:
+            values[i] = values[i].copy()
+        self._values = values
+        self._raw = None
+        self._dirty = None
+        self._snapshot = None
 
+        indexes = cls._indexes
         for k, v in kwargs.items():
-            if k in self._data:
-                self.__dict__['_data'][k] = v
+            if k in indexes:
+                values[indexes[k]] = v
             else:
                 raise AttributeError("Service definition has no attribute %s" % k)
+        if kwargs:
+            # Properties passed to the constructor are given explicitly (see ``get_explicit_data``)
+            self._dirty = {indexes[k] for k in kwargs}
 
-    def __getattr__(self, key):
-        if key in self._data:
-            return self._data[key]
-        else:
-            raise AttributeError("Service definition has no attribute %s" % key)
+    def _set_defaults(self, **kwargs):
+        """Sets properties to default values of a subclass. These are not considered to be given explicitly."""
+
+        indexes = self._indexes
+        for k, v in kwargs.items():
+            self._values[indexes[k]] = v
+            if self._dirty:
+                self._dirty = self._dirty - {indexes[k]}
+
+    @classmethod
+    def _compile_schema(cls):
+        instance = object.__new__(cls)
+        properties = cls.get_properties(instance)
+        types = cls.get_property_types(instance)
+
+        attr_name_map = {}
+        ags_name_map = {}
+        ags_indexes = {}
+        defaults = []
+        for i, (k, v) in enumerate(properties.items()):
+            if isinstance(v, str):
+                ags_name, default = v, None
+            else:
+                ags_name, default = v
+            attr_name_map[k] = ags_name
+            ags_name_map[ags_name] = k
+            ags_indexes[ags_name] = i
+            defaults.append(default)
+            setattr(cls, k, _Property(i))
+
+        cls._names = tuple(properties.keys())
+        cls._ags_names = tuple(attr_name_map.values())
+        cls._attr_name_map = MappingProxyType(attr_name_map)
+        cls._ags_name_map = MappingProxyType(ags_name_map)
+        cls._ags_indexes = MappingProxyType(ags_indexes)
+        cls._defaults = tuple(defaults)
+        cls._mutable_defaults = tuple(i for i, v in enumerate(defaults) if isinstance(v, (dict, list)))
+        cls._types = tuple(types.get(k) for k in cls._names)
+        # Sets of the indexes of properties set from dictionaries, keyed by the dictionaries' keys
+        cls._key_indexes = {}
+
+        # Set last: marks the schema as compiled
+        cls._indexes = MappingProxyType({k: i for i, k in enumerate(cls._names)})
 
-    def __setattr__(self, key, value):
-        if key in self._data:
-            self.__dict__['_data'][key] = value
+    def _decode(self, index):
+        """Decodes a value from the original mapping and stores it."""
+
+        value = self._raw[self._ags_names[index]]
+        property_type = self._types[index]
+        if isinstance(property_type, list) and isinstance(value, list):
+            value = [self._decode_value(property_type[0], item) for item in value]
+        elif property_type is not None:
+            value = self._decode_value(property_type, value)
         else:
-            raise AttributeError("Service definition has no attribute %s" % key)
+            # The original mapping is never modified, so that it can serve as a snapshot
+            value = copy_data(value)
+        self._values[index] = value
+        return value
+
+    @staticmethod
+    def _decode_value(property_type, value):
+        if not isinstance(value, dict):
+            return copy_data(value)
+        obj = property_type()
+        # Nested objects represent only the decoded mapping, so defaults are not added
+        obj._values = [None] * len(obj._values)
+        obj.set_from_dictionary(value, lazy=True)
+        return obj
+
+    def __getattr__(self, key):
+        # Only called if the attribute is not a property of this class
+        raise AttributeError("Service definition has no attribute %s" % key)
 
     def get_properties(self):
         """
@@ -51,29 +188,187 @@ class Properties(object):
 
         return {}
 
+    def get_property_types(self):
+        """
+        Returns a dictionary of types for properties which are decoded to ``Properties`` objects when hydrated lazily.
+        A type in a list indicates a list of objects of that type. For example::
+
+            {
+                'properties': MapServerProperties,
+                'extensions': [ServiceExtension]
+            }
+
+        """
+
+        return {}
+
     def get_data(self):
-        """Returns a dictionary representing this description."""
+        """
+        Returns a dictionary representing this description. If hydrated lazily, keys of the original mapping which
+        are not properties are included, and values which have not been accessed are included unchanged.
+        """
+
+        return self._get_data(False)
+
+    def get_explicit_data(self):
+        """
+        Returns a dictionary of only the properties which were given explicitly: passed to the constructor, set, or set
+        from a dictionary (since this object was last marked clean). Default values are not included, and nested
+        objects include only their explicit properties.
+        """
 
-        data = {}
-        for k, v in self._data.items():
-            key = self._attr_name_map[k]
+        return self._get_data(True)
+
+    def _get_data(self, explicit):
+        raw = self._raw
+        dirty = self._dirty or ()
+        data = {} if raw is None else dict(raw)
+        for i, (key, v) in enumerate(zip(self._ags_names, self._values)):
+            if v is _UNSET:
+                continue
+            if explicit and i not in dirty and key not in data:
+                # Nested objects may have explicit properties of their own
+                if not isinstance(v, Properties):
+                    continue
+                v = v._get_data(explicit)
+                if not v:
+                    continue
             if isinstance(v, Properties):
-                v = v.get_data()
+                v = v._get_data(explicit)
             if isinstance(v, (list, tuple)):
                 li = []
                 for item in v:
                     if isinstance(item, Properties):
-                        li.append(item.get_data())
+                        li.append(item._get_data(explicit))
                     else:
                         li.append(item)
                 v = li
             if v is not None:
                 data[key] = v
+            elif raw is not None:
+                data.pop(key, None)
         return data
 
-    def set_from_dictionary(self, d):
-        """Set properties form a dictionary. Keys are expected to be the API name, not the Python name."""
+    def has_changes(self):
+        """
+        Returns True if this object may have been modified since it was created or marked clean: a property has been
+        set, or a dictionary or list value has been accessed (and may have been modified in place). Returns False only
+        if this object is known to be unchanged.
+        """
+
+        if self._dirty:
+            return True
+        for v in self._values:
+            if v is _UNSET or v is None:
+                continue
+            if isinstance(v, Properties):
+                if v.has_changes():
+                    return True
+            elif isinstance(v, (dict, list, tuple)):
+                return True
+        return False
+
+    def mark_clean(self, snapshot=None):
+        """
+        Clears the record of properties which have been set, on this object and on nested objects.
+
+        :param snapshot: any value describing this object as it is now (optional), against which later changes can be
+        compared (see ``get_snapshot``). It is kept as is, so it costs nothing unless it is used.
+        """
+
+        self._dirty = None
+        self._snapshot = snapshot
+        for v in self._values:
+            if isinstance(v, Properties):
+                v.mark_clean()
+            elif isinstance(v, (list, tuple)):
+                for item in v:
+                    if isinstance(item, Properties):
+                        item.mark_clean()
+
+    def get_snapshot(self):
+        """Returns the snapshot given to ``mark_clean``, if any."""
+
+        return self._snapshot
+
+    def set_from_dictionary(self, d, lazy=False):
+        """
+        Set properties form a dictionary. Keys are expected to be the API name, not the Python name.
+
+        :param d: dictionary of properties
+        :param lazy: if True, the dictionary is kept (and must not be modified by the caller), and values are decoded
+        when first accessed. Decoded values are copies, so the dictionary is never modified through this object. Keys
+        which are not properties are retained and returned by ``get_data``.
+        """
+
+        ags_indexes = self._ags_indexes
+        values = self._values
+
+        if not lazy:
+            for k, v in d.items():
+                if k in ags_indexes:
+                    values[ags_indexes[k]] = v
+
+            # Responses of the same kind have the same keys, so objects hydrated from them share one immutable set
+            keys = tuple(d)
+            key_indexes = self._key_indexes
+            dirty = key_indexes.get(keys)
+            if dirty is None:
+                dirty = frozenset(ags_indexes[k] for k in keys if k in ags_indexes)
+                if len(key_indexes) < MAX_KEY_SETS:
+                    key_indexes[keys] = dirty
+            self._dirty = dirty | self._dirty if self._dirty else (dirty or None)
+            return
+
+        if self._raw is None:
+            self._raw = d
+        else:
+            # Undecoded values may still refer to the previous mapping
+            self._raw = dict(self._raw, **d)
+        for k in d:
+            if k in ags_indexes:
+                values[ags_indexes[k]] = _UNSET
+
+
+def copy_data(value):
+    """Returns a copy of a JSON-like value: dictionaries and lists are copied recursively, other values are shared."""
+
+    if isinstance(value, dict):
+        return {k: copy_data(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [copy_data(v) for v in value]
+    return value
+
+
+def diff_data(old, new, path=''):
+    """
+    Returns a list of the paths at which two JSON-like values differ, e.g., ``['maxIdleTime',
+    'properties.maxRecordCount', 'extensions[1].enabled']``. Keys which are added or removed are included.
+
+    :param old: original value
+    :param new: new value
+    :param path: path of the values (optional), used as a prefix
+    """
+
+    if isinstance(old, dict) and isinstance(new, dict):
+        changes = []
+        for k in old:
+            key_path = "%s.%s" % (path, k) if path else k
+            if k not in new:
+                changes.append(key_path)
+            else:
+                changes += diff_data(old[k], new[k], key_path)
+        for k in new:
+            if k not in old:
+                changes.append("%s.%s" % (path, k) if path else k)
+        return changes
+
+    if isinstance(old, list) and isinstance(new, list) and len(old) == len(new):
+        changes = []
+        for i, (a, b) in enumerate(zip(old, new)):
+            changes += diff_data(a, b, "%s[%d]" % (path, i))
+        return changes
 
-        for k, v in d.items():
-            if k in self._ags_name_map:
-                self._data[self._ags_name_map[k]] = v
\ No newline at end of file
+    if old != new or type(old) != type(new):
+        return [path]
+    return []
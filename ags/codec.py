@@ -0,0 +1,123 @@
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+
+class JSONCodec(object):
+    """
+    Encodes and decodes JSON using the standard library. Documents are decoded directly from bytes, and control
+    characters are allowed in strings (ArcGIS server responses may contain them).
+    """
+
+    name = 'json'
+
+    def loads(self, data):
+        """
+        Deserializes a JSON document.
+
+        :param data: bytes or str
+        """
+
+        return json.loads(data, strict=False)
+
+    def dumps(self, value, compact=False):
+        """
+        Serializes a value to a JSON string.
+
+        :param value: value to serialize
+        :param compact: if True, no whitespace is included
+        """
+
+        if compact:
+            return json.dumps(value, separators=(',', ':'))
+        return json.dumps(value)
+
+
+class OrjsonCodec(JSONCodec):
+    """
+    Encodes and decodes JSON using `orjson <https://github.com/ijl/orjson>`_. Documents which orjson rejects (e.g.,
+    those with control characters in strings) are decoded using the standard library.
+    """
+
+    name = 'orjson'
+
+    def __init__(self):
+        if orjson is None:
+            raise ImportError("OrjsonCodec requires orjson")
+
+    def loads(self, data):
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            return super(OrjsonCodec, self).loads(data)
+
+    def dumps(self, value, compact=False):
+        try:
+            # orjson output is always compact
+            return orjson.dumps(value).decode('utf-8')
+        except TypeError:
+            return super(OrjsonCodec, self).dumps(value, compact)
+
+
+class UjsonCodec(JSONCodec):
+    """
+    Encodes and decodes JSON using `ujson <https://github.com/ultrajson/ultrajson>`_. Documents which ujson rejects are
+    decoded using the standard library.
+    """
+
+    name = 'ujson'
+
+    def __init__(self):
+        if ujson is None:
+            raise ImportError("UjsonCodec requires ujson")
+
+    def loads(self, data):
+        try:
+            return ujson.loads(data)
+        except ValueError:
+            return super(UjsonCodec, self).loads(data)
+
+    def dumps(self, value, compact=False):
+        try:
+            # ujson output is always compact
+            return ujson.dumps(value, ensure_ascii=False)
+        except (TypeError, OverflowError):
+            return super(UjsonCodec, self).dumps(value, compact)
+
+
+CODECS = {
+    'orjson': OrjsonCodec,
+    'ujson': UjsonCodec,
+    'json': JSONCodec
+}
+
+
+def get_codec(codec=None):
+    """
+    Returns a JSON codec.
+
+    :param codec: codec instance, or name of a codec ('orjson', 'ujson', or 'json'). If not provided, the fastest
+    installed codec is used.
+    """
+
+    if isinstance(codec, JSONCodec):
+        return codec
+    if codec is not None:
+        try:
+            return CODECS[codec]()
+        except KeyError:
+            raise ValueError("Unknown JSON codec: %s" % codec)
+    if orjson is not None:
+        return OrjsonCodec()
+    if ujson is not None:
+        return UjsonCodec()
+    return JSONCodec()
+
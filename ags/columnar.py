@@ -0,0 +1,257 @@
+from array import array
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+ESRI_FIELD_DTYPES = {
+    'esriFieldTypeOID': 'int64',
+    'esriFieldTypeSmallInteger': 'int64',
+    'esriFieldTypeInteger': 'int64',
+    'esriFieldTypeSingle': 'float64',
+    'esriFieldTypeDouble': 'float64',
+    'esriFieldTypeDate': 'datetime64[ms]'
+}
+
+DTYPE_KIND_FIELD_TYPES = {
+    'b': 'esriFieldTypeSmallInteger',
+    'i': 'esriFieldTypeInteger',
+    'u': 'esriFieldTypeInteger',
+    'f': 'esriFieldTypeDouble',
+    'M': 'esriFieldTypeDate'
+}
+
+GEOMETRY_KEYS = {
+    'esriGeometryMultipoint': 'points',
+    'esriGeometryPolyline': 'paths',
+    'esriGeometryPolygon': 'rings'
+}
+
+
+class ColumnarFeatures(object):
+    """
+    Features (or records) in columnar form. Attributes are stored as one NumPy array per field. Geometries are stored
+    as a single array of coordinates, with offset arrays marking where each part and each feature begin:
+
+    * The coordinates of part ``i`` are ``coords[part_offsets[i]:part_offsets[i + 1]]``
+    * Feature ``j`` consists of parts ``feature_offsets[j]`` up to (but not including) ``feature_offsets[j + 1]``
+
+    Points have one part of one coordinate, and features without geometry have no parts.
+    """
+
+    def __init__(self, columns, coords=None, part_offsets=None, feature_offsets=None, geometry_type=None):
+        """
+        :param columns: dictionary of field names to NumPy arrays
+        :param coords: (n, 2) or (n, 3) array of coordinates
+        :param part_offsets: array of offsets into ``coords`` where each part begins, followed by the number of coords
+        :param feature_offsets: array of offsets into ``part_offsets`` where each feature begins, followed by the number
+        of parts
+        :param geometry_type: Esri geometry type (e.g., 'esriGeometryPolygon'), if known
+        """
+
+        self.columns = columns
+        self.coords = coords
+        self.part_offsets = part_offsets
+        self.feature_offsets = feature_offsets
+        self.geometry_type = geometry_type
+
+    def __len__(self):
+        if self.feature_offsets is not None:
+            return len(self.feature_offsets) - 1
+        for column in self.columns.values():
+            return len(column)
+        return 0
+
+    def to_structured_array(self):
+        """Returns the attributes as a NumPy structured array."""
+
+        return numpy.rec.fromarrays(list(self.columns.values()), names=list(self.columns.keys()))
+
+    def to_feature_set(self):
+        """
+        Returns an Esri JSON feature set (or record set, if there are no geometries) as a dictionary, suitable for use
+        as the input of a geoprocessing task. Null values (NaN and NaT) are returned as None.
+        """
+
+        names = list(self.columns.keys())
+        values = [_to_list(column) for column in self.columns.values()]
+        feature_set = {
+            'fields': [
+                {'name': name, 'type': DTYPE_KIND_FIELD_TYPES.get(column.dtype.kind, 'esriFieldTypeString')}
+                for name, column in self.columns.items()
+            ]
+        }
+        features = [{'attributes': dict(zip(names, row))} for row in zip(*values)] if values else []
+
+        if self.coords is not None and len(self.coords):
+            if self.geometry_type != 'esriGeometryPoint' and self.geometry_type not in GEOMETRY_KEYS:
+                raise ValueError("Geometry type is required to convert geometries: %s" % self.geometry_type)
+            if not features:
+                features = [{} for _ in range(len(self))]
+
+            coords = self.coords.tolist()
+            part_offsets = self.part_offsets.tolist()
+            feature_offsets = self.feature_offsets.tolist()
+            has_z = self.coords.shape[1] > 2
+            key = GEOMETRY_KEYS.get(self.geometry_type)
+
+            for i, feature in enumerate(features):
+                start, end = feature_offsets[i], feature_offsets[i + 1]
+                if start == end:
+                    continue
+                parts = [coords[part_offsets[j]:part_offsets[j + 1]] for j in range(start, end)]
+                if key is None:
+                    point = parts[0][0]
+                    feature['geometry'] = {'x': point[0], 'y': point[1]}
+                    if has_z and point[2] == point[2]:
+                        feature['geometry']['z'] = point[2]
+                elif key == 'points':
+                    feature['geometry'] = {'points': parts[0]}
+                else:
+                    feature['geometry'] = {key: parts}
+
+            feature_set['geometryType'] = self.geometry_type
+            if has_z:
+                feature_set['hasZ'] = True
+
+        feature_set['features'] = features
+        return feature_set
+
+
+def _to_array(values, dtype):
+    if dtype == 'float64':
+        return numpy.array([numpy.nan if v is None else v for v in values], dtype=dtype)
+    if dtype == 'datetime64[ms]':
+        nat = numpy.iinfo('int64').min
+        return numpy.array([nat if v is None else v for v in values], dtype='int64').view(dtype)
+    if dtype is not None and None not in values:
+        return numpy.array(values, dtype=dtype)
+    return numpy.array(values, dtype=object)
+
+
+def _to_list(column):
+    if column.dtype.kind == 'M':
+        nulls = numpy.isnat(column)
+        column = column.astype('datetime64[ms]').view('int64')
+    elif column.dtype.kind == 'f':
+        nulls = numpy.isnan(column)
+    else:
+        return column.tolist()
+
+    return [None if null else v for v, null in zip(column.tolist(), nulls.tolist())]
+
+
+def to_esri_json(value):
+    """
+    Converts ``ColumnarFeatures`` and NumPy arrays to values which can be serialized as JSON: ``ColumnarFeatures`` and
+    structured arrays are converted to feature sets (see ``ColumnarFeatures.to_feature_set``), and other arrays to
+    lists. All other values are returned unchanged.
+    """
+
+    if isinstance(value, ColumnarFeatures):
+        return value.to_feature_set()
+    if numpy is not None and isinstance(value, numpy.ndarray):
+        if value.dtype.names:
+            return ColumnarFeatures({name: value[name] for name in value.dtype.names}).to_feature_set()
+        return value.tolist()
+    return value
+
+
+def _get_field_dtypes(fields):
+    """Returns the names of fields, and a dictionary of field names to dtypes."""
+
+    names = [f['name'] if isinstance(f, dict) else f for f in fields]
+    dtypes = {f['name']: ESRI_FIELD_DTYPES.get(f.get('type')) for f in fields if isinstance(f, dict)}
+    return names, dtypes
+
+
+def features_to_columns(features, fields=None, geometry_type=None, include_geometry=True, has_z=False,
+                        container=None):
+    """
+    Converts Esri JSON features (or records) to a ``ColumnarFeatures`` object. Features are consumed in a single pass,
+    appending attribute values to per-field lists and coordinates to flat buffers, so any iterable (such as
+    ``GPResult.iter_features()``) may be used. Requires NumPy.
+
+    :param features: iterable of Esri JSON features
+    :param fields: list of Esri JSON field descriptions ({'name': name, 'type': type}) or field names. If not provided,
+    the attributes of the first feature are used.
+    :param geometry_type: Esri geometry type, if known
+    :param include_geometry: if False, geometries are skipped
+    :param has_z: if True, coordinates include z values (missing values are NaN)
+    :param container: dictionary from which 'fields' and 'geometryType' are read once all features have been consumed,
+    if they are not given. For example, the ``container`` filled in by ``ags.jsonstream.iter_json_array`` while
+    features are streamed.
+    """
+
+    if numpy is None:
+        raise ImportError("Columnar conversion requires numpy")
+
+    dimensions = 3 if has_z else 2
+    names = None
+    dtypes = {}
+    if fields:
+        names, dtypes = _get_field_dtypes(fields)
+
+    values = None
+    coords = array('d')
+    part_offsets = array('q', [0])
+    feature_offsets = array('q', [0])
+    nan = float('nan')
+
+    def append_coords(points):
+        for point in points:
+            coords.append(point[0])
+            coords.append(point[1])
+            if has_z:
+                coords.append(point[2] if len(point) > 2 else nan)
+        part_offsets.append(len(coords) // dimensions)
+
+    for feature in features:
+        attributes = feature.get('attributes') or {}
+        if names is None:
+            names = list(attributes.keys())
+        if values is None:
+            values = [[] for _ in names]
+        for column, name in zip(values, names):
+            column.append(attributes.get(name))
+
+        if include_geometry:
+            geometry = feature.get('geometry')
+            if geometry:
+                if 'x' in geometry:
+                    point = (geometry['x'], geometry['y'], geometry.get('z', nan))
+                    append_coords((point,))
+                elif 'points' in geometry:
+                    append_coords(geometry['points'])
+                else:
+                    for part in geometry.get('rings') or geometry.get('paths') or []:
+                        append_coords(part)
+            feature_offsets.append(len(part_offsets) - 1)
+
+    if container is not None:
+        geometry_type = geometry_type or container.get('geometryType')
+        if not fields and container.get('fields'):
+            field_names, dtypes = _get_field_dtypes(container['fields'])
+            if values is None:
+                names = field_names
+            elif set(field_names) == set(names):
+                # Order columns as the fields are ordered, as if the fields had been known from the start
+                values = [values[names.index(name)] for name in field_names]
+                names = field_names
+
+    names = names or []
+    values = values or [[] for _ in names]
+    columns = {name: _to_array(column, dtypes.get(name)) for name, column in zip(names, values)}
+
+    if not include_geometry:
+        return ColumnarFeatures(columns, geometry_type=geometry_type)
+
+    return ColumnarFeatures(
+        columns,
+        numpy.frombuffer(coords, dtype='float64').reshape(-1, dimensions),
+        numpy.frombuffer(part_offsets, dtype='int64'),
+        numpy.frombuffer(feature_offsets, dtype='int64'),
+        geometry_type
+    )
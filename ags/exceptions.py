@@ -2,6 +2,10 @@ class ConnectionError(IOError):
     pass
 
 
+class CircuitOpenError(ConnectionError):
+    """Raised without making a request while the circuit breaker for a host is open (see ``ags.retry``)."""
+
+
 class HTTPError(Exception):
     def __init__(self, message=None, status_code=None):
         super(HTTPError, self).__init__(message)
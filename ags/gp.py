@@ -1,13 +1,53 @@
-import json
+import gzip
+import hashlib
+import heapq
+import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from itertools import count
 from time import sleep
+from urllib.parse import urlencode, urlparse, unquote
 
-import requests
+from ags.codec import get_codec
+from ags.columnar import features_to_columns, to_esri_json
+from ags.jsonstream import iter_json_array, iter_batches
+from ags.multipart import MultipartEncoder
+from ags.polling import FixedInterval, ExponentialBackoff
+from ags.session import create_session
+
+
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+STREAM_CHUNK_SIZE = 64 * 1024
 
 
 class GPError(Exception):
+    def __init__(self, message=None, status_code=None):
+        super(GPError, self).__init__(message)
+        self.status_code = status_code
+
+
+class GPTimeoutError(GPError):
     pass
 
 
+def _encode_parameter(value, codec):
+    value = to_esri_json(value)
+    if isinstance(value, (dict, list, tuple)):
+        return codec.dumps(value, compact=True)
+    return value
+
+
+def _get_size(value):
+    """Returns the size in bytes of a string or bytes value, as it is sent."""
+
+    if isinstance(value, str):
+        # Most values are ASCII, in which case encoding is not needed to count bytes
+        return len(value) if value.isascii() else len(value.encode('utf-8'))
+    return len(value)
+
+
 class GPMessage(object):
     """Wrapper for geoprocessing messages"""
 
@@ -42,16 +82,258 @@ class GPMessage(object):
 class GPResult(object):
     """Wrapper for geoprocessing results"""
 
-    def __init__(self, name, type, value):
+    def __init__(self, name, type=None, value=None, loader=None, task=None, param_url=None):
         """
         :param name: result name
         :param type: result type
         :param value: result value
+        :param loader: callable which returns the result parameter response (a dictionary with 'dataType' and 'value'
+        keys). If provided, the type and value are loaded on first access.
+        :param task: the ``GPTask`` which produced this result, used for its session and token when downloading
+        :param param_url: relative URL of this result within the job, for results of asynchronous jobs
         """
 
         self.name = name
-        self.type = type
-        self.value = value
+        self._type = type
+        self._value = value
+        self._loader = loader
+        self.task = task
+        self.param_url = param_url
+        self._session = None  # Used while downloading, if there is no task
+
+    def _load(self):
+        if self._loader is not None:
+            data = self._loader()
+            self._type = data['dataType']
+            self._value = data['value']
+            self._loader = None
+
+    @property
+    def is_loaded(self):
+        return self._loader is None
+
+    @property
+    def type(self):
+        self._load()
+        return self._type
+
+    @type.setter
+    def type(self, value):
+        self._type = value
+
+    @property
+    def value(self):
+        self._load()
+        return self._value
+
+    @value.setter
+    def value(self, value):
+        self._loader = None
+        self._value = value
+
+    @property
+    def url(self):
+        """The URL of the output file, for file and raster results, otherwise None."""
+
+        value = self.value
+        if isinstance(value, dict):
+            return value.get('url', None)
+        return None
+
+    def iter_features(self, batch_size=None, chunk_size=STREAM_CHUNK_SIZE):
+        """
+        Yields the features (or records) of a feature set or record set result one at a time, or in lists of
+        ``batch_size`` features.
+
+        If the value of the result has not been loaded (see the ``lazy_results`` option of ``GPTask``), the result is
+        streamed from the server and parsed incrementally, so that only one feature is held in memory at a time.
+
+        :param batch_size: if provided, features are yielded in lists of up to this many features
+        :param chunk_size: number of bytes read from the server at a time, when streaming
+        """
+
+        features = self._iter_features(chunk_size)
+        if batch_size:
+            return iter_batches(features, batch_size)
+        return features
+
+    def _iter_features(self, chunk_size=STREAM_CHUNK_SIZE, container=None):
+        if self.is_loaded or self.task is None or self.param_url is None:
+            return iter((self.value or {}).get('features', []))
+        return self._stream_features(chunk_size, container)
+
+    def to_columns(self, include_geometry=True, has_z=False):
+        """
+        Converts a feature set or record set result to columnar form: a NumPy array per attribute and flat coordinate
+        and offset arrays for geometries. See ``ags.columnar.ColumnarFeatures``. Requires NumPy.
+
+        If the value of the result has not been loaded, features are streamed from the server (see ``iter_features``),
+        and the fields and geometry type are read from the same response.
+
+        :param include_geometry: if False, geometries are skipped
+        :param has_z: if True, coordinates include z values
+        """
+
+        fields = None
+        geometry_type = None
+        if self.is_loaded and isinstance(self.value, dict):
+            fields = self.value.get('fields', None)
+            geometry_type = self.value.get('geometryType', None)
+
+        # Filled in with the other values of the feature set, if it is streamed
+        container = {}
+        return features_to_columns(self._iter_features(container=container), fields=fields,
+                                   geometry_type=geometry_type, include_geometry=include_geometry, has_z=has_z,
+                                   container=container)
+
+    def _stream_features(self, chunk_size, container=None):
+        task = self.task
+        url = task._get_result_url(self.param_url)
+        with task.session.get(url, cookies=task._get_cookies(), stream=True, timeout=task.timeout) as r:
+            if r.status_code != 200:
+                raise GPError("Server returned HTTP %d" % r.status_code, r.status_code)
+            features = iter_json_array(r.iter_content(chunk_size), ('value', 'features'), loads=task.codec.loads,
+                                       container=container)
+            for feature in features:
+                yield feature
+
+    def _request(self, method, headers=None, stream=True):
+        task = self.task
+        if task is not None:
+            return task._get_download_session().request(
+                method, self.url, headers=headers, cookies=task._get_cookies(), stream=stream, timeout=task.timeout
+            )
+        return self._session.request(method, self.url, headers=headers, stream=stream)
+
+    def download(self, path_or_file, chunk_size=DOWNLOAD_CHUNK_SIZE, resume=False, parts=1, checksum=None,
+                 expected_checksum=None):
+        """
+        Downloads the output file of a file or raster result, streaming it to disk in chunks.
+
+        :param path_or_file: path to which the file is written, or a writable file-like object
+        :param chunk_size: number of bytes read and written at a time
+        :param resume: if True, and ``path_or_file`` is a path to a partially downloaded file, only the remainder of
+        the file is requested (if the server supports range requests)
+        :param parts: number of ranges to download in parallel. Only used when downloading to a path, and if the server
+        supports range requests.
+        :param checksum: name of a ``hashlib`` algorithm (e.g., 'sha256'). If provided, the hex digest of the
+        downloaded file is returned.
+        :param expected_checksum: if provided, the digest is compared to this value and ``GPError`` is raised if they
+        differ
+
+        Results of an ``AsyncGPTask`` are downloaded with its ``download_result`` coroutine instead.
+        """
+
+        self._check_download(checksum, expected_checksum)
+        if self.task is not None:
+            # Fails before any file is written if the task cannot download synchronously
+            self.task._get_download_session()
+
+        if self.task is None:
+            # All requests of this download (including ranges downloaded in parallel) share a connection pool
+            self._session = create_session(pool_size=max(parts, 1))
+        try:
+            if isinstance(path_or_file, str):
+                if parts > 1 and not (resume and os.path.exists(path_or_file)):
+                    length = self._get_range_length()
+                    if length:
+                        self._download_parts(path_or_file, length, parts, chunk_size)
+                    else:
+                        self._download_to_path(path_or_file, chunk_size, resume=False)
+                else:
+                    self._download_to_path(path_or_file, chunk_size, resume)
+                digest = self._get_file_digest(path_or_file, checksum, chunk_size) if checksum else None
+            else:
+                hasher = hashlib.new(checksum) if checksum else None
+                self._download_to_file(path_or_file, chunk_size, hasher=hasher)
+                digest = hasher.hexdigest() if hasher else None
+        finally:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+
+        self._verify_checksum(digest, expected_checksum)
+        return digest
+
+    def _check_download(self, checksum=None, expected_checksum=None):
+        if not self.url:
+            raise GPError("Result %s does not have a file to download" % self.name)
+        if expected_checksum and not checksum:
+            raise ValueError("A checksum algorithm is required to verify the expected checksum")
+
+    def _verify_checksum(self, digest, expected_checksum):
+        if expected_checksum and digest.lower() != expected_checksum.lower():
+            raise GPError("Checksum of downloaded file %s does not match expected checksum %s" % (
+                digest, expected_checksum
+            ))
+
+    def _check_response(self, r, allowed=(200,)):
+        if r.status_code not in allowed:
+            r.close()
+            raise GPError("Server returned HTTP %d" % r.status_code)
+
+    def _download_to_file(self, file_obj, chunk_size, headers=None, hasher=None):
+        with self._request('GET', headers=headers) as r:
+            self._check_response(r, (200, 206))
+            for chunk in r.iter_content(chunk_size):
+                file_obj.write(chunk)
+                if hasher is not None:
+                    hasher.update(chunk)
+            return r.status_code
+
+    def _download_to_path(self, path, chunk_size, resume):
+        offset = os.path.getsize(path) if resume and os.path.exists(path) else 0
+        if not offset:
+            with open(path, 'wb') as f:
+                self._download_to_file(f, chunk_size)
+            return
+
+        with self._request('GET', headers={'Range': "bytes=%d-" % offset}) as r:
+            if r.status_code == 416:
+                # The requested range starts at the end of the file; it is already complete
+                return
+            self._check_response(r, (200, 206))
+            # If the server ignored the range request, start over
+            with open(path, 'ab' if r.status_code == 206 else 'wb') as f:
+                for chunk in r.iter_content(chunk_size):
+                    f.write(chunk)
+
+    def _get_range_length(self):
+        """Returns the length of the file if the server supports range requests, otherwise None."""
+
+        with self._request('HEAD', stream=False) as r:
+            if r.status_code != 200 or r.headers.get('Accept-Ranges', '').lower() != 'bytes':
+                return None
+            try:
+                return int(r.headers['Content-Length'])
+            except (KeyError, ValueError):
+                return None
+
+    def _download_parts(self, path, length, parts, chunk_size):
+        with open(path, 'wb') as f:
+            f.truncate(length)
+
+        part_size = (length + parts - 1) // parts
+
+        def download_part(start):
+            end = min(start + part_size, length) - 1
+            with self._request('GET', headers={'Range': "bytes=%d-%d" % (start, end)}) as r:
+                self._check_response(r, (206,))
+                with open(path, 'r+b') as f:
+                    f.seek(start)
+                    for chunk in r.iter_content(chunk_size):
+                        f.write(chunk)
+
+        with ThreadPoolExecutor(max_workers=parts) as executor:
+            for _ in executor.map(download_part, range(0, length, part_size)):
+                pass
+
+    def _get_file_digest(self, path, algorithm, chunk_size):
+        hasher = hashlib.new(algorithm)
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(chunk_size), b""):
+                hasher.update(chunk)
+        return hasher.hexdigest()
 
 
 class GPTask(object):
@@ -72,17 +354,46 @@ class GPTask(object):
     CANCELLING = 6
     CANCELLED = 7
 
-    def __init__(self, url, parameters={}, token=None):
+    def __init__(self, url, parameters={}, token=None, session=None, timeout=None, polling=None, lazy_results=False,
+                 result_workers=4, upload_threshold=None, compress=False, codec=None, retry_policy=None):
         """
 
         :param url: url of geoprocessing tool
         :param parameters: dictionary containing input parameters for tool
         :param token: authorization token generated by server, if required
+        :param session: HTTP session to use for requests (optional). Tasks on the same server may share a session
+        (see ``ags.session.create_session``) to share its connection pool.
+        :param timeout: request timeout in seconds, or a (connect, read) tuple (optional)
+        :param polling: strategy used to wait between status requests while blocking (see ``ags.polling``). Defaults
+        to polling once per second.
+        :param lazy_results: if True, each result of an asynchronous job is downloaded when its type or value is first
+        accessed, rather than when the job succeeds
+        :param result_workers: maximum number of result parameters downloaded at once
+        :param upload_threshold: size in bytes above which an input parameter is uploaded to the service (which must
+        have uploads enabled) and passed by its item ID, rather than sent in the request body (optional)
+        :param compress: if True, request bodies are gzip-compressed. Only use this if the server (or a proxy in front
+        of it) accepts compressed request bodies.
+        :param codec: JSON codec, or name of a codec (see ``ags.codec.get_codec``). Defaults to the fastest installed.
+        :param retry_policy: policy for retrying requests which fail with transient errors, and for failing fast while
+        the server is unhealthy (optional), e.g., an ``ags.retry.RetryPolicy``. Only status, result, and cancel
+        requests are retried; submitting or executing the task is not.
+
+        Input parameters may be strings, values which can be serialized as JSON (sent in compact form), NumPy arrays,
+        or ``ags.columnar.ColumnarFeatures`` (see ``ags.columnar.to_esri_json``).
         """
 
         self.url = url
         self.parameters = parameters
         self.token = token
+        self.session = session if session is not None else self._create_session()
+        self.timeout = timeout
+        self.polling = polling if polling is not None else FixedInterval(1)
+        self.lazy_results = lazy_results
+        self.result_workers = result_workers
+        self.upload_threshold = upload_threshold
+        self.compress = compress
+        self.codec = get_codec(codec)
+        self.retry_policy = retry_policy
         self.output_sr = None
         self.process_sr = None
         self.return_z = False
@@ -92,115 +403,238 @@ class GPTask(object):
         self.status = self.NOT_SUBMITTED
         self.messages = []
         self.job_id = None
+        self.poll_count = 0
+        self.results = {}
 
-    def submit_job(self, blocking=False):
-        """
-        Submit the task for asynchronous processing.
+    def _create_session(self):
+        return create_session()
 
-        :param blocking: If True, this call will continue to poll (and block) until the job is complete.
-        """
+    def _get_download_session(self):
+        """Returns the session used to download output files of results."""
 
-        self.synchronous = False
+        return self.session
+
+    def _get_request_data(self):
         data = {
             'f': "json",
             'returnZ': str(self.return_z).lower(),
             'returnM': str(self.return_m).lower()
         }
-        data.update(self.parameters)
+        data.update((k, _encode_parameter(v, self.codec)) for k, v in self.parameters.items())
         if self.output_sr:
             data['env:outputSR'] = self.output_sr
         if self.process_sr:
             data['env:processSR'] = self.process_sr
-
-        url = "%s/submitJob" % self.url
+        return data
+
+    def _get_uploads(self, data):
+        """Returns the names of parameters which are large enough to be uploaded rather than sent inline."""
+
+        if self.upload_threshold is None:
+            return []
+        return [
+            k for k in self.parameters
+            if isinstance(data.get(k), (str, bytes)) and _get_size(data[k]) > self.upload_threshold
+        ]
+
+    def _get_upload_url(self):
+        return "%s/uploads/upload" % self.url.rsplit('/', 1)[0]
+
+    def _get_upload_body(self, name, value):
+        return MultipartEncoder(
+            fields={'f': "json", 'description': name},
+            files={'file': ("%s.json" % name, value, "application/json")}
+        )
+
+    def _handle_upload_response(self, data):
+        """Returns the parameter value referencing an uploaded item."""
+
+        try:
+            item_id = data['item']['itemID']
+        except (KeyError, TypeError):
+            error = data.get('error', {}).get('message') if isinstance(data, dict) else None
+            raise GPError("Upload failed: %s" % (error or "server response is missing 'itemID' parameter"))
+        return self.codec.dumps({'itemID': item_id}, compact=True)
+
+    def _upload_parameters(self, data):
+        for name in self._get_uploads(data):
+            data[name] = self._handle_upload_response(self._send(partial(self._upload_parameter, name, data[name])))
+        return data
+
+    def _upload_parameter(self, name, value):
+        body = self._get_upload_body(name, value)
+        r = self.session.post(
+            self._get_upload_url(), data=body, headers={'Content-Type': body.content_type},
+            cookies=self._get_cookies(), timeout=self.timeout
+        )
+        return self._parse_response(r.status_code, r.content)
+
+    def _encode_request(self, data):
+        """Returns the body and headers of a request to submit or execute the task."""
+
+        if not self.compress:
+            return data, {}
+        headers = {'Content-Type': "application/x-www-form-urlencoded", 'Content-Encoding': "gzip"}
+        return gzip.compress(urlencode(data).encode('utf-8')), headers
+
+    def _post_task(self, url):
+        body, headers = self._encode_request(self._upload_parameters(self._get_request_data()))
+        return self._send(partial(self._request, 'POST', url, data=body, headers=headers))
+
+    def _request(self, method, url, **kwargs):
+        r = self.session.request(method, url, cookies=self._get_cookies(), timeout=self.timeout, **kwargs)
+        return self._parse_response(r.status_code, r.content)
+
+    def _get_retry_host(self):
+        return urlparse(self.url).netloc
+
+    def _send(self, fn, idempotent=False):
+        """Calls ``fn``, which makes a request, using the retry policy if there is one."""
+
+        if self.retry_policy is None:
+            return fn()
+        return self.retry_policy.call(self._get_retry_host(), fn, idempotent)
+
+    def _get_cookies(self):
         cookies = {}
         if self.token:
             cookies['agstoken'] = self.token
-        r = requests.post(url, data=data, cookies=cookies)
-        if 200 >= r.status_code < 300:
+        return cookies
+
+    def _get_status_url(self):
+        return "%s/jobs/%s?f=json" % (self.url, self.job_id)
+
+    def _get_result_url(self, param_url):
+        return "%s/jobs/%s/%s?f=json" % (self.url, self.job_id, param_url)
+
+    def _parse_response(self, status_code, content):
+        """Validates and deserializes a server response."""
+
+        if 200 >= status_code < 300:
             try:
-                data = json.loads(r.text, strict=False)
+                return self.codec.loads(content)
             except ValueError:
                 raise GPError("Server did not return a valid JSON response")
-            try:
-                self.job_id = data['jobId']
-            except KeyError:
-                raise GPError("Server response is missing 'jobId' parameter")
-            return self.poll(blocking=blocking)
         else:
-            raise GPError("Server returned HTTP %d" % r.status_code)
+            raise GPError("Server returned HTTP %d" % status_code, status_code)
+
+    def _handle_submit_response(self, data):
+        try:
+            self.job_id = data['jobId']
+        except KeyError:
+            raise GPError("Server response is missing 'jobId' parameter")
+
+    def _handle_status_response(self, data):
+        """Updates status and messages from a job status response. Returns the job results, if any."""
+
+        try:
+            status = data['jobStatus']
+        except KeyError:
+            raise GPError("Server response is missing 'jobStatus' parameter")
+        if status in ESRI_JOB_STATUSES:
+            self.status = ESRI_JOB_STATUSES[status]
+        else:
+            raise GPError("Unrecognized job status: %s" % status)
+        self._populate_messages(data.get('messages', None))
+        return data.get('results', None)
+
+    def _handle_execute_response(self, data):
+        """Updates status, messages, and results from a synchronous execute response."""
+
+        if data.get("error", None):
+            self.status = self.FAILED
+            self._populate_messages(data['error'].get('details', None))
+            return
+        self.status = self.SUCCEEDED
+        self._populate_messages(data.get('messages', None))
+        self._populate_results(data.get('results', None))
+
+    def _handle_cancel_response(self, data):
+        status = data.get('jobStatus', None)
+        if status in ESRI_JOB_STATUSES:
+            self.status = ESRI_JOB_STATUSES[status]
+        elif data.get('error', None):
+            raise GPError("Server could not cancel job: %s" % data['error'].get('message', ""))
+
+    def _needs_results(self):
+        return self.status == self.SUCCEEDED and not self.results
+
+    def is_complete(self):
+        """Returns True if the job has succeeded, failed, or been cancelled."""
+
+        return self.status in (self.SUCCEEDED, self.FAILED, self.CANCELLED)
+
+    def _get_deadline(self, timeout):
+        if timeout is None:
+            timeout = self.polling.timeout
+        return (time.time() + timeout if timeout is not None else None), timeout
+
+    def _get_poll_interval(self, intervals, deadline, timeout):
+        """
+        Returns the number of seconds to wait before the next poll, or raises GPTimeoutError if past the deadline.
+        """
 
-    def poll(self, blocking=False):
+        interval = next(intervals)
+        if deadline is not None:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                raise GPTimeoutError("Job %s did not complete within %s seconds" % (self.job_id, timeout))
+            interval = min(interval, remaining)
+        return interval
+
+    def submit_job(self, blocking=False, timeout=None):
         """
-        Poll job status.
+        Submit the task for asynchronous processing.
 
         :param blocking: If True, this call will continue to poll (and block) until the job is complete.
+        :param timeout: maximum number of seconds to wait for the job to complete, if blocking. Defaults to the timeout
+        of the polling strategy.
         """
 
-        url = "%s/jobs/%s?f=json" % (self.url, self.job_id)
+        self.synchronous = False
+        self.poll_count = 0
+        self.results = {}
+        self._handle_submit_response(self._post_task("%s/submitJob" % self.url))
+        return self.poll(blocking=blocking, timeout=timeout)
+
+    def poll(self, blocking=False, timeout=None):
+        """
+        Poll job status. The number of status requests made for the job is kept in ``poll_count``. Results are
+        retrieved once, when the job has succeeded.
+
+        :param blocking: If True, this call will continue to poll (and block) until the job is complete.
+        :param timeout: maximum number of seconds to wait for the job to complete, if blocking. Defaults to the timeout
+        of the polling strategy. If the job does not complete in time, ``GPTimeoutError`` is raised.
+        """
+
+        intervals = self.polling.intervals()
+        deadline, timeout = self._get_deadline(timeout)
 
         while True:
-            cookies = {}
-            if self.token:
-                cookies['agstoken'] = self.token
-            r = requests.get(url, cookies=cookies)
-            if 200 >= r.status_code < 300:
-                try:
-                    data = json.loads(r.text, strict=False)
-                except ValueError:
-                    raise GPError("Server did not return a valid JSON response")
-                try:
-                    status = data['jobStatus']
-                except KeyError:
-                    raise GPError("Server response is missing 'jobStatus' parameter")
-                if status in ESRI_JOB_STATUSES:
-                    self.status = ESRI_JOB_STATUSES[status]
-                else:
-                    raise GPError("Unrecognized job status: %s" % status)
-                self._populate_messages(data.get('messages', None))
-                self._populate_results(data.get('results', None))
-                if not blocking or self.status in (self.SUCCEEDED, self.FAILED, self.CANCELLED):
-                    return self.status
-                else:
-                    sleep(1)
-                    continue
-            else:
-                raise GPError("Server returned HTTP %d" % r.status_code)
+            data = self._send(partial(self._request, 'GET', self._get_status_url()), idempotent=True)
+            self.poll_count += 1
+            results = self._handle_status_response(data)
+            if self._needs_results():
+                self._populate_results(results)
+            if not blocking or self.is_complete():
+                return self.status
+            sleep(self._get_poll_interval(intervals, deadline, timeout))
+
+    def cancel(self):
+        """Requests cancellation of the submitted job. Returns the job status reported by the server."""
+
+        url = "%s/jobs/%s/cancel" % (self.url, self.job_id)
+        # Cancelling a job which is already cancelling has no further effect, so this may be retried
+        data = self._send(partial(self._request, 'POST', url, data={'f': "json"}), idempotent=True)
+        self._handle_cancel_response(data)
+        return self.status
 
     def execute(self):
         """Submit the task for synchronous processing."""
 
         self.synchronous = True
-        data = {
-            'f': "json",
-            'returnZ': str(self.return_z).lower(),
-            'returnM': str(self.return_m).lower()
-        }
-        data.update(self.parameters)
-        if self.output_sr:
-            data['env:outputSR'] = self.output_sr
-        if self.process_sr:
-            data['env:processSR'] = self.process_sr
-        url = "%s/execute" % self.url
-        cookies = {}
-        if self.token:
-            cookies['agstoken'] = self.token
-        r = requests.post(url, data=data, cookies=cookies)
-        if 200 >= r.status_code < 300:
-            try:
-                data = json.loads(r.text, strict=False)
-            except ValueError:
-                raise GPError("Server did not return a valid JSON response")
-            if data.get("error", None):
-                self.status = self.FAILED
-                self._populate_messages(data['error'].get('details', None))
-                return self.status
-            self.status = self.SUCCEEDED
-            self._populate_messages(data.get('messages', None))
-            self._populate_results(data.get('results', None))
-            return self.status
-        else:
-            raise GPError("Server returned HTTP %d" % r.status_code)
+        self._handle_execute_response(self._post_task("%s/execute" % self.url))
+        return self.status
 
     def _populate_messages(self, messages):
         self.messages = []
@@ -215,28 +649,179 @@ class GPTask(object):
                 elif isinstance(message, str):
                     self.messages.append(GPMessage(GPMessage.ERROR, message))
 
+    def _create_result(self, data, param_url=None):
+        return GPResult(
+            data['paramName'],
+            data['dataType'],
+            data['value'],
+            task=self,
+            param_url=param_url
+        )
+
+    def _fetch_result(self, param_url):
+        return self._send(partial(self._request, 'GET', self._get_result_url(param_url)), idempotent=True)
+
     def _populate_results(self, results):
         self.results = {}
         if self.synchronous and isinstance(results, list):
             for result in results:
                 if isinstance(result, dict) and 'paramName' in result and 'dataType' in result:
-                    self.results[result['paramName']] = GPResult(
-                        result['paramName'],
-                        result['dataType'],
-                        result['value']
-                    )
+                    self.results[result['paramName']] = self._create_result(result)
         elif not self.synchronous and isinstance(results, dict):
-            for k, v in results.items():
-                cookies = {}
-                if self.token:
-                    cookies['agstoken'] = self.token
-                r = requests.get("%s/jobs/%s/%s?f=json" % (self.url, self.job_id, v['paramUrl']), cookies=cookies)
-                data = json.loads(r.text, strict=False)
-                self.results[data['paramName']] = GPResult(
-                    data['paramName'],
-                    data['dataType'],
-                    data['value']
-                )
+            if self.lazy_results:
+                for k, v in results.items():
+                    self.results[k] = GPResult(k, loader=partial(self._fetch_result, v['paramUrl']), task=self,
+                                               param_url=v['paramUrl'])
+            elif results:
+                param_urls = [v['paramUrl'] for v in results.values()]
+                with ThreadPoolExecutor(max_workers=min(len(param_urls), self.result_workers)) as executor:
+                    for param_url, data in zip(param_urls, executor.map(self._fetch_result, param_urls)):
+                        self.results[data['paramName']] = self._create_result(data, param_url)
+
+    def download_all(self, directory, max_workers=4, **kwargs):
+        """
+        Downloads the output files of all file and raster results to a directory, several at a time. Files are named
+        after the last part of their URL. Returns a dictionary mapping result names to downloaded file paths.
+
+        :param directory: directory to which files are written
+        :param max_workers: maximum number of files to download at once
+        :param kwargs: additional arguments passed to ``GPResult.download``
+        """
+
+        downloads = self._get_downloads(directory)
+        if downloads:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                futures = [executor.submit(result.download, path, **kwargs) for result, path in downloads.values()]
+                for future in futures:
+                    future.result()
+
+        return {name: path for name, (result, path) in downloads.items()}
+
+    def _get_downloads(self, directory):
+        """Returns a dictionary mapping result names to (result, path) tuples, for results with output files."""
+
+        downloads = {}
+        for name, result in self.results.items():
+            url = result.url
+            if url:
+                filename = unquote(os.path.basename(urlparse(url).path)) or name
+                downloads[name] = (result, os.path.join(directory, filename))
+        return downloads
+
+
+class GPJobManager(object):
+    """
+    Submits many asynchronous geoprocessing tasks and tracks them from a single loop, without a blocked thread per job.
+
+    Usage::
+
+        manager = GPJobManager(tasks, max_active=20)
+        for task in manager.run():
+            if task in manager.errors:
+                print("Error:", manager.errors[task])
+            elif task.status == GPTask.SUCCEEDED:
+                print(task.results)
+    """
+
+    def __init__(self, tasks=None, max_active=10, polling=None):
+        """
+        :param tasks: ``GPTask`` instances to submit (optional, more can be added with ``add``)
+        :param max_active: maximum number of jobs submitted and not yet complete at once
+        :param polling: strategy used to wait between status requests for each job (see ``ags.polling``). Defaults to
+        exponential backoff from one second to 30 seconds. The strategy's timeout, if any, applies to each job.
+        """
+
+        self.max_active = max_active
+        self.polling = polling if polling is not None else ExponentialBackoff(min_interval=1, max_interval=30)
+        self.pending = deque(tasks or [])
+        self.active = {}
+        self.errors = {}
+        self._queue = []
+        self._sequence = count()
+
+    def add(self, task):
+        """Adds a task to be submitted."""
+
+        self.pending.append(task)
+
+    def _submit(self, task):
+        task.submit_job(blocking=False)
+        if task.is_complete():
+            return True
+
+        intervals = self.polling.intervals()
+        now = time.time()
+        deadline = now + self.polling.timeout if self.polling.timeout is not None else None
+        self.active[task] = (intervals, deadline)
+        heapq.heappush(self._queue, (now + next(intervals), next(self._sequence), task))
+        return False
+
+    def _poll(self, task):
+        intervals, deadline = self.active[task]
+        task.poll(blocking=False)
+        if task.is_complete():
+            return True
+
+        now = time.time()
+        if deadline is not None and now >= deadline:
+            raise GPTimeoutError("Job %s did not complete within %s seconds" % (task.job_id, self.polling.timeout))
+        heapq.heappush(self._queue, (now + next(intervals), next(self._sequence), task))
+        return False
+
+    def run(self):
+        """
+        Generator which submits pending tasks and polls active jobs, yielding each task as its job completes
+        (succeeds, fails, or is cancelled). If submitting or polling a task raises an error, the task is yielded and
+        the exception is stored in ``errors``.
+        """
+
+        while self.pending or self.active:
+            while self.pending and len(self.active) < self.max_active:
+                task = self.pending.popleft()
+                try:
+                    complete = self._submit(task)
+                except Exception as e:
+                    self.errors[task] = e
+                    complete = True
+                if complete:
+                    yield task
+
+            if not self._queue:
+                continue
+
+            due, _, task = heapq.heappop(self._queue)
+            if task not in self.active:
+                continue
+
+            wait = due - time.time()
+            if wait > 0:
+                sleep(wait)
+
+            try:
+                complete = self._poll(task)
+            except Exception as e:
+                self.errors[task] = e
+                complete = True
+            if complete:
+                del self.active[task]
+                yield task
+
+    def cancel_all(self):
+        """
+        Discards tasks which have not been submitted, and requests cancellation of all active jobs. Cancelled jobs
+        are yielded by ``run`` once the server reports them as cancelled. Returns the list of discarded tasks.
+        """
+
+        discarded = list(self.pending)
+        self.pending.clear()
+
+        for task in list(self.active):
+            try:
+                task.cancel()
+            except Exception as e:
+                self.errors[task] = e
+
+        return discarded
 
 
 ESRI_JOB_STATUSES = {
@@ -0,0 +1,143 @@
+import json
+import re
+from functools import partial
+
+
+_STRUCTURE_RE = re.compile(rb'[{}\[\]"]')
+_STRING_END_RE = re.compile(rb'["\\]')
+
+
+def iter_json_array(chunks, path, strict=False, loads=None, container=None):
+    """
+    Incrementally parses a JSON document, yielding each item of the array found at ``path`` as it is read. Only the
+    item currently being read is held in memory, so arrays of any size can be processed in constant memory.
+
+    Items of the array must be objects or arrays (e.g., features of a feature set). Parsing stops when the end of the
+    array is reached, unless ``container`` is given.
+
+    Example::
+
+        for feature in iter_json_array(response.iter_content(65536), ('value', 'features')):
+            ...
+
+    :param chunks: iterable of bytes (e.g., ``response.iter_content(chunk_size)``)
+    :param path: sequence of object keys leading to the array
+    :param strict: passed to ``json.loads``; if False, control characters are allowed in strings
+    :param loads: function used to deserialize each item from bytes (optional), e.g., ``ags.codec.JSONCodec.loads``.
+    If provided, ``strict`` is ignored.
+    :param container: dictionary (optional) which is updated with the other values of the object containing the array
+    (e.g., 'fields' and 'geometryType' of a feature set), once all items have been yielded. If provided, the rest of
+    the document is read after the end of the array.
+    """
+
+    if loads is None:
+        loads = partial(json.loads, strict=strict)
+
+    path = list(path)
+    chunks = iter(chunks)
+    buf = bytearray()
+    pos = 0
+    stack = []  # [is_object, last key] for each open container
+    target_depth = None
+    item_start = None
+    string_start = None
+
+    # If the container is wanted, the document is kept without the contents of the array
+    outside = bytearray() if container is not None else None
+    copied = 0  # Position in the buffer up to which the document has been kept (or skipped, within the array)
+    in_array = False
+
+    while True:
+        if string_start is not None:
+            m = _STRING_END_RE.search(buf, pos)
+            if m is not None and m.group() == b'"':
+                pos = m.end()
+                if item_start is None and stack and stack[-1][0]:
+                    stack[-1][1] = json.loads(bytes(buf[string_start:pos]).decode('utf-8'), strict=False)
+                string_start = None
+                continue
+            if m is not None and m.end() < len(buf):
+                # Skip the escaped character
+                pos = m.end() + 1
+                continue
+            pos = m.start() if m is not None else len(buf)
+        else:
+            m = _STRUCTURE_RE.search(buf, pos)
+            if m is not None:
+                c = m.group()
+                pos = m.end()
+                if c == b'"':
+                    string_start = m.start()
+                elif c == b'{' or c == b'[':
+                    if item_start is None and target_depth is not None and len(stack) == target_depth:
+                        item_start = m.start()
+                    elif (c == b'[' and target_depth is None and len(stack) == len(path) and
+                          all(s[0] and s[1] == key for s, key in zip(stack, path))):
+                        target_depth = len(stack) + 1
+                        if outside is not None:
+                            outside += buf[copied:pos]
+                            copied = pos
+                            in_array = True
+                    stack.append([c == b'{', None])
+                else:
+                    if not stack:
+                        raise ValueError("Invalid JSON document: unexpected %s" % c.decode('ascii'))
+                    stack.pop()
+                    if item_start is not None and len(stack) == target_depth:
+                        yield loads(bytes(buf[item_start:pos]))
+                        del buf[:pos]
+                        pos = 0
+                        copied = 0
+                        item_start = None
+                    elif in_array and len(stack) < target_depth:
+                        # End of the array: keep the rest of the document, and no longer look for items
+                        in_array = False
+                        copied = m.start()
+                        target_depth = -1
+                    elif target_depth is not None and len(stack) < target_depth and outside is None:
+                        return
+                continue
+            pos = len(buf)
+
+        # More data is needed. Discard everything which has been processed and is no longer needed.
+        keep = min(p for p in (item_start, string_start, pos) if p is not None)
+        if keep:
+            if outside is not None and not in_array:
+                outside += buf[copied:keep]
+            copied = max(copied - keep, 0)
+            del buf[:keep]
+            pos -= keep
+            if item_start is not None:
+                item_start -= keep
+            if string_start is not None:
+                string_start -= keep
+
+        chunk = next(chunks, None)
+        if chunk is None:
+            if stack or string_start is not None:
+                raise ValueError("Unexpected end of JSON document")
+            if outside is not None:
+                outside += buf[copied:]
+                _update_container(container, json.loads(bytes(outside).decode('utf-8'), strict=False), path)
+            return
+        buf += chunk
+
+
+def _update_container(container, document, path):
+    for key in path[:-1]:
+        document = document.get(key) if isinstance(document, dict) else None
+    if isinstance(document, dict):
+        container.update((k, v) for k, v in document.items() if k != path[-1])
+
+
+def iter_batches(items, batch_size):
+    """Groups items from an iterable into lists of up to ``batch_size`` items."""
+
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
@@ -0,0 +1,130 @@
+import os
+import uuid
+
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+
+def _quote(value):
+    return value.replace('\\', '\\\\').replace('"', '%22').replace('\r', '%0D').replace('\n', '%0A')
+
+
+class MultipartEncoder(object):
+    """
+    Streaming multipart/form-data request body. The body is generated as it is read, so file contents are never held
+    in memory, and its length is known in advance so that no chunked transfer encoding is needed.
+
+    Instances may be passed as the ``data`` argument of a ``requests`` request, along with ``content_type`` as the
+    Content-Type header. An encoder can only be read once.
+    """
+
+    def __init__(self, fields=None, files=None, boundary=None, chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        :param fields: dictionary or list of (name, value) tuples. Values which are lists or tuples are sent as several
+        fields with the same name; None values are skipped.
+        :param files: dictionary or list of (name, file) tuples, where file is a file-like object, bytes, a string, or a
+        (filename, file) or (filename, file, content_type) tuple
+        :param boundary: multipart boundary (optional)
+        :param chunk_size: size of chunks read from files
+        """
+
+        self.boundary = boundary or uuid.uuid4().hex
+        self.content_type = "multipart/form-data; boundary=%s" % self.boundary
+        self.chunk_size = chunk_size
+
+        self._parts = []
+        for name, value in self._items(fields):
+            if isinstance(value, (list, tuple)):
+                values = value
+            else:
+                values = [value]
+            for v in values:
+                if v is not None:
+                    self._add_part(name, self._to_bytes(v))
+        for name, value in self._items(files):
+            if isinstance(value, (list, tuple)):
+                content_type = value[2] if len(value) > 2 else "application/octet-stream"
+                filename, value = value[0], value[1]
+            else:
+                filename = os.path.basename(getattr(value, 'name', None) or name)
+                content_type = "application/octet-stream"
+            if isinstance(value, str):
+                value = value.encode('utf-8')
+            self._add_part(name, value, filename, content_type)
+
+        self._trailer = ("--%s--\r\n" % self.boundary).encode('utf-8')
+        self.len = sum(len(header) + length + 2 for header, body, length in self._parts) + len(self._trailer)
+
+        self._iterator = None
+        self._buffer = b""
+
+    @staticmethod
+    def _items(values):
+        if not values:
+            return []
+        if hasattr(values, 'items'):
+            return list(values.items())
+        return list(values)
+
+    @staticmethod
+    def _to_bytes(value):
+        if isinstance(value, bytes):
+            return value
+        return str(value).encode('utf-8')
+
+    def _add_part(self, name, body, filename=None, content_type=None):
+        disposition = 'form-data; name="%s"' % _quote(name)
+        if filename is not None:
+            disposition += '; filename="%s"' % _quote(filename)
+        header = "--%s\r\nContent-Disposition: %s\r\n" % (self.boundary, disposition)
+        if content_type:
+            header += "Content-Type: %s\r\n" % content_type
+        header += "\r\n"
+
+        if isinstance(body, bytes):
+            length = len(body)
+        else:
+            position = body.tell()
+            body.seek(0, os.SEEK_END)
+            length = body.tell() - position
+            body.seek(position)
+
+        self._parts.append((header.encode('utf-8'), body, length))
+
+    def __len__(self):
+        return self.len
+
+    def __iter__(self):
+        for header, body, length in self._parts:
+            yield header
+            if isinstance(body, bytes):
+                if body:
+                    yield body
+            else:
+                remaining = length
+                while remaining > 0:
+                    chunk = body.read(min(self.chunk_size, remaining))
+                    if not chunk:
+                        raise IOError("File ended before the expected length was read")
+                    remaining -= len(chunk)
+                    yield chunk
+            yield b"\r\n"
+        yield self._trailer
+
+    def read(self, size=-1):
+        """Reads up to ``size`` bytes of the encoded body (all remaining bytes if ``size`` is negative)."""
+
+        if self._iterator is None:
+            self._iterator = iter(self)
+
+        while size < 0 or len(self._buffer) < size:
+            try:
+                self._buffer += next(self._iterator)
+            except StopIteration:
+                break
+
+        if size < 0:
+            data, self._buffer = self._buffer, b""
+        else:
+            data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
@@ -0,0 +1,100 @@
+import random
+
+
+class PollingStrategy(object):
+    """
+    Base class for strategies which determine how long to wait between job status requests. Strategies are stateless;
+    each call to ``intervals`` starts a new sequence, so a strategy may be shared by many tasks.
+    """
+
+    def __init__(self, timeout=None):
+        """
+        :param timeout: maximum number of seconds to wait for a job to complete (optional)
+        """
+
+        self.timeout = timeout
+
+    def intervals(self):
+        """Generator which yields the number of seconds to wait before each successive poll."""
+
+        raise NotImplementedError
+
+
+class FixedInterval(PollingStrategy):
+    """Polls at a fixed interval."""
+
+    def __init__(self, interval=1, timeout=None):
+        """
+        :param interval: seconds between polls
+        :param timeout: maximum number of seconds to wait for a job to complete (optional)
+        """
+
+        super(FixedInterval, self).__init__(timeout)
+        self.interval = interval
+
+    def intervals(self):
+        while True:
+            yield self.interval
+
+
+class ExponentialBackoff(PollingStrategy):
+    """
+    Polls at an interval which starts at ``min_interval`` and grows by ``factor`` after each poll, up to
+    ``max_interval``. Each interval is randomly adjusted by up to ``jitter`` (as a fraction of the interval), so that
+    many jobs started together do not poll in lockstep.
+    """
+
+    def __init__(self, min_interval=0.5, max_interval=30, factor=2, jitter=0.1, timeout=None):
+        """
+        :param min_interval: seconds before the first poll
+        :param max_interval: maximum seconds between polls
+        :param factor: multiplier applied to the interval after each poll
+        :param jitter: maximum random adjustment, as a fraction of the interval
+        :param timeout: maximum number of seconds to wait for a job to complete (optional)
+        """
+
+        super(ExponentialBackoff, self).__init__(timeout)
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.factor = factor
+        self.jitter = jitter
+
+    def _apply_jitter(self, interval):
+        if self.jitter:
+            interval *= random.uniform(1 - self.jitter, 1 + self.jitter)
+        return min(max(interval, 0), self.max_interval)
+
+    def intervals(self):
+        interval = self.min_interval
+        while True:
+            yield self._apply_jitter(interval)
+            interval = min(interval * self.factor, self.max_interval)
+
+
+class FastThenBackoff(ExponentialBackoff):
+    """
+    Polls quickly for the first ``fast_polls`` polls, so that short jobs are picked up with little latency, then backs
+    off exponentially for longer jobs.
+    """
+
+    def __init__(self, fast_interval=0.2, fast_polls=10, min_interval=1, max_interval=30, factor=2, jitter=0.1,
+                 timeout=None):
+        """
+        :param fast_interval: seconds between the initial polls
+        :param fast_polls: number of polls made at ``fast_interval``
+        :param min_interval: seconds between polls after the initial polls, before backing off
+        :param max_interval: maximum seconds between polls
+        :param factor: multiplier applied to the interval after each poll
+        :param jitter: maximum random adjustment, as a fraction of the interval
+        :param timeout: maximum number of seconds to wait for a job to complete (optional)
+        """
+
+        super(FastThenBackoff, self).__init__(min_interval, max_interval, factor, jitter, timeout)
+        self.fast_interval = fast_interval
+        self.fast_polls = fast_polls
+
+    def intervals(self):
+        for _ in range(self.fast_polls):
+            yield self.fast_interval
+        for interval in super(FastThenBackoff, self).intervals():
+            yield interval
@@ -0,0 +1,256 @@
+import asyncio
+import threading
+import time
+
+from requests.exceptions import ConnectionError as _ConnectionError, Timeout as _Timeout
+
+from ags.exceptions import CircuitOpenError, ConnectionError, ServerError
+from ags.polling import ExponentialBackoff
+
+
+RETRY_STATUS_CODES = (429, 502, 503, 504)
+
+
+class CircuitBreaker(object):
+    """
+    Fails fast while a host is unhealthy. After ``failure_threshold`` consecutive transient failures, the circuit opens
+    and requests raise ``CircuitOpenError`` without being sent. After ``reset_timeout`` seconds, a single trial request
+    is let through: if it succeeds, the circuit closes; if it fails, the circuit opens again.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, host, failure_threshold=5, reset_timeout=30):
+        """
+        :param host: host name (used in error messages)
+        :param failure_threshold: number of consecutive failures after which the circuit opens
+        :param reset_timeout: seconds after which an open circuit lets a trial request through
+        """
+
+        self.host = host
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+        self.failures = 0
+        self._opened_at = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self._opened_at is None:
+            return self.CLOSED
+        if self._trial or time.time() - self._opened_at < self.reset_timeout:
+            return self.OPEN
+        return self.HALF_OPEN
+
+    def before_request(self):
+        """Raises ``CircuitOpenError`` if the circuit is open. Returns True if the request is the trial request."""
+
+        with self._lock:
+            state = self.state
+            if state == self.CLOSED:
+                return False
+            if state == self.OPEN:
+                raise CircuitOpenError("Circuit is open for host %s after %d failures" % (self.host, self.failures))
+            self._trial = True
+            return True
+
+    def cancel_trial(self):
+        """Lets another trial request through, after the trial request was abandoned (e.g., cancelled)."""
+
+        with self._lock:
+            self._trial = False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self._opened_at = None
+            self._trial = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial or self.failures >= self.failure_threshold:
+                self._opened_at = time.time()
+            self._trial = False
+
+
+class RetryBudget(object):
+    """
+    Limits retries to a fraction of requests, so that retries cannot multiply the load on a server which is already
+    failing. Each request adds ``ratio`` to a balance (up to ``min_retries``), and each retry spends 1.
+    """
+
+    def __init__(self, ratio=0.2, min_retries=10):
+        """
+        :param ratio: retries allowed per request, over time
+        :param min_retries: retries allowed in a burst, and the maximum balance
+        """
+
+        self.ratio = ratio
+        self.min_retries = min_retries
+        self.balance = float(min_retries)
+        self._lock = threading.Lock()
+
+    def record_request(self):
+        with self._lock:
+            self.balance = min(self.balance + self.ratio, self.min_retries)
+
+    def try_spend(self):
+        """Returns True, and spends from the balance, if a retry is allowed."""
+
+        with self._lock:
+            if self.balance >= 1:
+                self.balance -= 1
+                return True
+            return False
+
+
+class RetryPolicy(object):
+    """
+    Retries requests which fail with transient errors, waiting between attempts with exponential backoff and jitter.
+    Only idempotent requests (GETs, and POSTs which are safe to repeat) are retried. A policy keeps a circuit breaker
+    for each host, so it may be shared by several clients to share their view of each host's health.
+
+    Transient errors are connection errors and timeouts, HTTP errors with a status code in ``retry_status_codes``, and
+    (if ``retry_server_errors`` is True) error responses from ArcGIS server.
+    """
+
+    def __init__(self, max_attempts=3, backoff=None, retry_status_codes=RETRY_STATUS_CODES, retry_server_errors=True,
+                 budget=None, failure_threshold=5, reset_timeout=30):
+        """
+        :param max_attempts: maximum number of attempts for each request, including the first
+        :param backoff: polling strategy which determines the wait between attempts (see ``ags.polling``). Defaults to
+        exponential backoff from 0.5 up to 10 seconds, with jitter.
+        :param retry_status_codes: HTTP status codes which are retried
+        :param retry_server_errors: if True, error responses from ArcGIS server (``ServerError``) are retried
+        :param budget: ``RetryBudget`` shared by all requests using this policy. Defaults to a budget of 20% of
+        requests.
+        :param failure_threshold: consecutive transient failures after which the circuit for a host opens
+        :param reset_timeout: seconds after which an open circuit lets a trial request through
+        """
+
+        self.max_attempts = max_attempts
+        self.backoff = backoff if backoff is not None else ExponentialBackoff(0.5, 10, 2, jitter=0.5)
+        self.retry_status_codes = retry_status_codes
+        self.retry_server_errors = retry_server_errors
+        self.budget = budget if budget is not None else RetryBudget()
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+        self.breakers = {}
+        self._lock = threading.Lock()
+
+    def get_breaker(self, host):
+        """Returns the circuit breaker for a host."""
+
+        with self._lock:
+            if host not in self.breakers:
+                self.breakers[host] = CircuitBreaker(host, self.failure_threshold, self.reset_timeout)
+            return self.breakers[host]
+
+    def is_transient(self, error):
+        """Returns True if an error is transient, and the request may succeed if it is repeated."""
+
+        if isinstance(error, CircuitOpenError):
+            return False
+        if isinstance(error, (ConnectionError, _ConnectionError, _Timeout, asyncio.TimeoutError)):
+            return True
+        if getattr(error, 'status_code', None) in self.retry_status_codes:
+            return True
+        return self.retry_server_errors and isinstance(error, ServerError)
+
+    def _should_retry(self, error, breaker, attempt, idempotent):
+        transient = self.is_transient(error)
+        if transient:
+            breaker.record_failure()
+        else:
+            # The host responded; the request itself was at fault
+            breaker.record_success()
+        if transient and breaker.state != CircuitBreaker.CLOSED:
+            # This failure opened the circuit; the caller should see the failure, not ``CircuitOpenError``
+            return False
+        return transient and idempotent and attempt < self.max_attempts and self.budget.try_spend()
+
+    @staticmethod
+    def _before_request(breaker, last_error):
+        """Calls ``breaker.before_request``, chaining ``CircuitOpenError`` to the error of the previous attempt."""
+
+        try:
+            return breaker.before_request()
+        except CircuitOpenError as e:
+            if last_error is None:
+                raise
+            raise e from last_error
+
+    def call(self, host, fn, idempotent=False):
+        """
+        Calls ``fn`` (which makes a request to ``host``), retrying it if it fails with a transient error and
+        ``idempotent`` is True. ``fn`` is called again for each attempt, so any request body must be created within it.
+
+        :param host: host to which the request is made
+        :param fn: callable which makes the request and returns the result
+        :param idempotent: if True, the request may be repeated
+        """
+
+        breaker = self.get_breaker(host)
+        intervals = self.backoff.intervals()
+        self.budget.record_request()
+
+        attempt = 0
+        last_error = None
+        while True:
+            attempt += 1
+            trial = self._before_request(breaker, last_error)
+            try:
+                result = fn()
+            except Exception as e:
+                if not self._should_retry(e, breaker, attempt, idempotent):
+                    raise
+                last_error = e
+                time.sleep(next(intervals))
+                continue
+            except BaseException:
+                # Cancelled or interrupted: the circuit must not wait forever for the trial's result
+                if trial:
+                    breaker.cancel_trial()
+                raise
+            breaker.record_success()
+            return result
+
+    async def call_async(self, host, fn, idempotent=False):
+        """
+        Coroutine equivalent of ``call``. ``fn`` is a callable which returns an awaitable making the request.
+
+        :param host: host to which the request is made
+        :param fn: callable which returns an awaitable
+        :param idempotent: if True, the request may be repeated
+        """
+
+        breaker = self.get_breaker(host)
+        intervals = self.backoff.intervals()
+        self.budget.record_request()
+
+        attempt = 0
+        last_error = None
+        while True:
+            attempt += 1
+            trial = self._before_request(breaker, last_error)
+            try:
+                result = await fn()
+            except Exception as e:
+                if not self._should_retry(e, breaker, attempt, idempotent):
+                    raise
+                last_error = e
+                await asyncio.sleep(next(intervals))
+                continue
+            except BaseException:
+                # Cancelled or interrupted: the circuit must not wait forever for the trial's result
+                if trial:
+                    breaker.cancel_trial()
+                raise
+            breaker.record_success()
+            return result
@@ -0,0 +1,24 @@
+import requests
+from requests.adapters import HTTPAdapter
+
+
+DEFAULT_POOL_SIZE = 10
+
+
+def create_session(pool_size=DEFAULT_POOL_SIZE, keep_alive=True):
+    """
+    Creates a new HTTP session backed by a connection pool. Connections (and TLS sessions) are reused between requests
+    to the same host, rather than opening a new connection for each request. A session may be shared between several
+    clients (for example, many ``GPTask`` instances pointing at the same server) so that they share a single pool.
+
+    :param pool_size: maximum number of connections kept open per host
+    :param keep_alive: if False, connections are closed after each request
+    """
+
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    if not keep_alive:
+        session.headers['Connection'] = "close"
+    return session
@@ -0,0 +1,88 @@
+"""
+Measures the time and memory needed to hydrate ``Properties`` objects from dictionaries, as the admin clients do for
+every service status, service definition, and upload item they retrieve.
+
+Usage::
+
+    python benchmarks/hydrate_properties.py [count]
+"""
+
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from ags.admin.services.base import ServiceDefinition, ServiceStatus  # noqa: E402
+from ags.admin.uploads import UploadItem  # noqa: E402
+
+
+SAMPLES = (
+    (ServiceStatus, {'configuredState': "STARTED", 'realTimeState': "STARTED"}),
+    (ServiceDefinition, {
+        'serviceName': "roads",
+        'type': "MapServer",
+        'description': "",
+        'capabilities': "Map,Query,Data",
+        'clusterName': "default",
+        'minInstancesPerNode': 1,
+        'maxInstancesPerNode': 2,
+        'maxWaitTime': 60,
+        'maxStartupTime': 300,
+        'maxIdleTime': 1800,
+        'maxUsageTime': 600,
+        'recycleInterval': 24,
+        'loadBalancing': "ROUND_ROBIN",
+        'isolationLevel': "HIGH",
+        'properties': {'maxRecordCount': 1000},
+        'extensions': [],
+        'datasets': []
+    }),
+    (UploadItem, {
+        'itemID': "i1234",
+        'itemName': "roads.sd",
+        'description': "",
+        'pathOnServer': "/arcgis/uploads/i1234/roads.sd",
+        'date': 1400000000000,
+        'committed': True
+    })
+)
+
+
+def hydrate(cls, data, count):
+    objects = []
+    for _ in range(count):
+        obj = cls()
+        obj.set_from_dictionary(data)
+        objects.append(obj)
+    return objects
+
+
+def main(count=100000):
+    for cls, data in SAMPLES:
+        # The first instance compiles the schema of the class
+        hydrate(cls, data, 1)
+
+        start = time.perf_counter()
+        hydrate(cls, data, count)
+        elapsed = time.perf_counter() - start
+
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        objects = hydrate(cls, data, count)
+        size = (tracemalloc.get_traced_memory()[0] - before) / float(count)
+        tracemalloc.stop()
+        del objects
+
+        print("%-18s %6.2fs  %5d bytes/object" % (cls.__name__, elapsed, size))
+
+    obj = hydrate(ServiceStatus, SAMPLES[0][1], 1)[0]
+    start = time.perf_counter()
+    for _ in range(count):
+        obj.configured_state
+    print("%d attribute reads  %4dms" % (count, (time.perf_counter() - start) * 1000))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:2]])
@@ -0,0 +1,62 @@
+import json
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from ags.admin.server import ServerAdmin
+
+
+THREADS = 64
+REQUESTS = 1000
+
+
+class StubResponse(object):
+    def __init__(self, data, status_code=200):
+        self.status_code = status_code
+        self.reason = "OK"
+        self.content = json.dumps(data).encode('utf-8')
+
+
+class StubSession(object):
+    """
+    Stands in for a ``requests.Session``. A status request returns the service name it was made for as the service's
+    state, so that a response delivered to the wrong caller is detected.
+    """
+
+    def __init__(self):
+        self.token_requests = 0
+        self.tokens = set()
+        self._lock = threading.Lock()
+
+    def post(self, url, data=None, **kwargs):
+        assert url.endswith('/generateToken')
+        with self._lock:
+            self.token_requests += 1
+        # Widen the window in which other threads may also try to request a token
+        time.sleep(0.05)
+        return StubResponse({'token': "token", 'expires': (time.time() + 3600) * 1000})
+
+    def get(self, url, params=None, **kwargs):
+        with self._lock:
+            self.tokens.add(params['token'])
+        time.sleep(random.random() * 0.001)
+        service_name = url.rsplit('/services/', 1)[1].split('.', 1)[0]
+        return StubResponse({'configuredState': service_name, 'realTimeState': params['f']})
+
+    def close(self):
+        pass
+
+
+def test_shared_server_admin():
+    session = StubSession()
+    admin = ServerAdmin('localhost', 'admin', 'password', session=session)
+    names = ['service%d' % i for i in range(REQUESTS)]
+
+    with ThreadPoolExecutor(max_workers=THREADS) as executor:
+        statuses = list(executor.map(lambda name: admin.get_service_status(name, 'MapServer'), names))
+
+    assert [status.configured_state for status in statuses] == names
+    assert all(status.realtime_state == 'json' for status in statuses)
+    assert session.token_requests == 1
+    assert session.tokens == {'token'}
@@ -0,0 +1,17 @@
+import os
+import time
+
+from ags.admin.tokens import FileTokenCache, TokenManager
+
+
+def test_insecure_cache_directory(tmp_path):
+    directory = str(tmp_path / "tokens")
+    os.mkdir(directory)
+    os.chmod(directory, 0o777)
+
+    cache = FileTokenCache(directory)
+    manager = TokenManager(lambda: ("token", (time.time() + 3600) * 1000), cache=cache, cache_key="key")
+
+    assert manager.get_token() == "token"
+    assert os.listdir(directory) == []
+    assert cache.get("key") is None